@@ -0,0 +1,52 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+# stamp(view, request, *args, **kwargs) returns (version, last_modified) from
+# one cheap query, or None to serve the view without validators. The ETag
+# also covers the URL, since the host and query parameters change the body.
+def conditional_get(stamp, vary=None):
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            result = stamp(view, request, *args, **kwargs)
+            if result is None:
+                return method(view, request, *args, **kwargs)
+
+            version, last_modified = result
+            digest = hashlib.md5(
+                f"{type(view).__name__}:{version}:{request.build_absolute_uri()}".encode()
+            ).hexdigest()
+            etag = quote_etag(digest)
+            timestamp = int(last_modified.timestamp()) if isinstance(last_modified, datetime) else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+            if vary:
+                patch_vary_headers(response, vary)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def latest(*timestamps):
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps) if timestamps else None
+
+
+def queryset_stamp(view, request, *args, **kwargs):
+    stamp = view.get_queryset().aggregate(count=Count("pk"), last_modified=Max("updated_at"))
+    return f"{stamp['count']}:{stamp['last_modified']}", stamp["last_modified"]
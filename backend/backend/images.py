@@ -0,0 +1,154 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+VARIANT_FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpeg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+variants_updated = Signal()
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            thread_name_prefix="image-variants",
+        )
+    return _executor
+
+
+def variant_path(name, width, extension):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "variants", f"{stem}_{width}.{extension}")
+
+
+def _flatten(image):
+    if image.mode == "RGB":
+        return image
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A") if "A" in image.getbands() else None)
+    return background
+
+
+def generate_variants(name):
+    with default_storage.open(name, "rb") as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or "A" in image.getbands() else "RGB")
+
+    sizes = {}
+    previous_width = None
+    for width in settings.IMAGE_VARIANT_WIDTHS:
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+        if resized.width == previous_width:
+            break
+        previous_width = resized.width
+
+        size = {"width": resized.width, "height": resized.height}
+        for extension, image_format, options in VARIANT_FORMATS:
+            output = _flatten(resized) if image_format == "JPEG" else resized
+            buffer = BytesIO()
+            output.save(buffer, image_format, **options)
+
+            path = variant_path(name, width, extension)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            size[extension] = default_storage.save(path, ContentFile(buffer.getvalue()))
+        sizes[str(width)] = size
+
+    return {"source": name, "sizes": sizes}
+
+
+def refresh_variants(model, pk, image_field, variants_field):
+    name = model.objects.filter(pk=pk).values_list(image_field, flat=True).first()
+    if not name:
+        return
+
+    try:
+        variants = generate_variants(name)
+    except Exception:
+        logger.exception("Could not generate image variants for %s", name)
+        return
+
+    # Only store the result if the image was not replaced in the meantime.
+    if model.objects.filter(pk=pk, **{image_field: name}).update(**{variants_field: variants}):
+        variants_updated.send(sender=model, pk=pk)
+
+
+def schedule_variants(instance, image_field, variants_field):
+    image = getattr(instance, image_field)
+    variants = getattr(instance, variants_field) or {}
+
+    if not image:
+        if variants:
+            type(instance).objects.filter(pk=instance.pk).update(**{variants_field: {}})
+            variants_updated.send(sender=type(instance), pk=instance.pk)
+        return
+    if variants.get("source") == image.name:
+        return
+
+    queue_variants(type(instance), [instance.pk], image_field, variants_field)
+
+
+def queue_variants(model, pks, image_field, variants_field):
+    pks = list(pks)
+    if not pks:
+        return
+
+    def run(pk):
+        try:
+            refresh_variants(model, pk, image_field, variants_field)
+        finally:
+            connections.close_all()
+
+    def submit():
+        executor = _get_executor()
+        for pk in pks:
+            executor.submit(run, pk)
+
+    transaction.on_commit(submit)
+
+
+def variant_urls(variants, request=None):
+    urls = {}
+    for width, size in (variants or {}).get("sizes", {}).items():
+        urls[width] = {
+            "width": size["width"],
+            "height": size["height"],
+            **{
+                extension: _absolute(default_storage.url(size[extension]), request)
+                for extension, _, _ in VARIANT_FORMATS
+                if extension in size
+            },
+        }
+    return urls
+
+
+def variant_srcset(variants, request=None, extension="webp"):
+    return ", ".join(
+        f"{urls[extension]} {urls['width']}w"
+        for urls in variant_urls(variants, request).values()
+        if extension in urls
+    )
+
+
+def _absolute(url, request):
+    return request.build_absolute_uri(url) if request else url
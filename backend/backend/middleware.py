@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .profiling import PROFILE_KINDS, profile_cpu, profile_memory
+from .timing import current_serializer_timer, install_serializer_timing, serializer_timer
+
+logger = logging.getLogger("backend.requests")
+
+MAX_LOGGED_DUPLICATES = 5
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.limit = None
+        self.limit_hit = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Refuse the query that would go over the limit rather than failing
+        # once the view has returned, when its writes are already committed.
+        if self.limit is not None and self.count >= self.limit:
+            limit, self.limit, self.limit_hit = self.limit, None, True
+            raise QueryBudgetExceeded(f"Query {self.count + 1} goes over the query budget of {limit}")
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.duration += elapsed
+            self.count += 1
+            self.statements[sql] += 1
+            timer = current_serializer_timer()
+            if timer is not None and timer.active:
+                timer.query_duration += elapsed
+
+    def duplicates(self):
+        # Statements are compared with their placeholders, before parameters
+        # are bound, so an N+1 loop shows up as one fingerprint.
+        return [
+            {
+                "fingerprint": hashlib.md5(sql.encode()).hexdigest()[:12],
+                "count": count,
+                "sql": sql[:200],
+            }
+            for sql, count in self.statements.most_common()
+            if count > 1
+        ]
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_serializer_timing()
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.query_recorder = recorder
+        request.query_budget = getattr(settings, "QUERY_BUDGET", None)
+        request.view_name = None
+        request.render_duration = 0.0
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            timer = stack.enter_context(serializer_timer())
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        # Queries run while serializing (lazy relations) are counted under db.
+        serialize = max(timer.duration - timer.query_duration, 0)
+        app = max(total - recorder.duration - serialize - request.render_duration, 0)
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+            f"app;dur={app * 1000:.1f}",
+            f"serialize;dur={serialize * 1000:.1f}",
+            f"render;dur={request.render_duration * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+        duplicates = recorder.duplicates()
+        over_budget = recorder.limit_hit or (
+            request.query_budget is not None and recorder.count > request.query_budget
+        )
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": request.view_name,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "query_budget": request.query_budget,
+            "duplicate_queries": sum(duplicate["count"] - 1 for duplicate in duplicates),
+            "duplicates": duplicates[:MAX_LOGGED_DUPLICATES],
+            "db_ms": round(recorder.duration * 1000, 1),
+            "app_ms": round(app * 1000, 1),
+            "serialize_ms": round(serialize * 1000, 1),
+            "render_ms": round(request.render_duration * 1000, 1),
+            "total_ms": round(total * 1000, 1),
+        }
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "view_class", None)
+        request.view_name = view_class.__name__ if view_class else view_func.__name__
+        request.query_budget = getattr(view_class, "query_budget", request.query_budget)
+        if settings.DEBUG and getattr(settings, "QUERY_BUDGET_RAISE", False):
+            request.query_recorder.limit = request.query_budget
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def finished(rendered):
+            request.render_duration = time.perf_counter() - started
+
+        response.add_post_render_callback(finished)
+        return response
+
+
+class ProfilingMiddleware:
+    header = "HTTP_X_PROFILE"
+    param = "_profile"
+    profilers = {"cpu": profile_cpu, "memory": profile_memory}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # cProfile and tracemalloc are process wide, so only one request is
+        # profiled at a time; others are served normally meanwhile.
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        kind = (request.META.get(self.header) or request.GET.get(self.param) or "").lower()
+        if kind not in PROFILE_KINDS or not self.is_staff(request):
+            return self.get_response(request)
+        if not self.lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response["X-Profile"] = "busy"
+            return response
+
+        try:
+            response, path = self.profilers[kind](request, self.get_response)
+        finally:
+            self.lock.release()
+
+        url = request.build_absolute_uri(reverse("profile-download", args=[path.name]))
+        response["X-Profile"] = kind
+        response["X-Profile-URL"] = url
+        return response
+
+    def is_staff(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except (AuthenticationFailed, InvalidToken):
+            return False
+        return result is not None and result[0].is_staff
@@ -0,0 +1,173 @@
+import base64
+import binascii
+import hashlib
+import json
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def cached_count(queryset):
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    key = "pagination-count:" + hashlib.md5(repr((sql, params)).encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, "PAGINATION_COUNT_CACHE_TIMEOUT", 60))
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, "query"):
+            return cached_count(self.object_list)
+        return len(self.object_list)
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    count_query_param = "with_count"
+    ordering_param = api_settings.ORDERING_PARAM
+    default_ordering = "-created_at"
+    invalid_cursor_message = "Invalid cursor"
+
+    @classmethod
+    def is_requested(cls, request):
+        params = request.query_params
+        return cls.cursor_query_param in params or params.get(cls.mode_query_param) == "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.field, self.descending = self.get_ordering(request, view)
+
+        cursor = self.decode_cursor(request)
+        backwards = cursor is not None and cursor["d"] == "prev"
+
+        self.count = None
+        if request.query_params.get(self.count_query_param):
+            self.count = cached_count(queryset)
+
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(
+                    self.position_filter(cursor["v"], cursor["pk"], backwards)
+                )
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+        queryset = queryset.order_by(*self.order_by(backwards))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if backwards:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        payload = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return Response(payload)
+
+    def get_ordering(self, request, view):
+        allowed = getattr(view, "ordering_fields", None) or []
+        requested = request.query_params.get(self.ordering_param, "")
+        ordering = requested.split(",")[0].strip() if requested else ""
+
+        if not ordering or ordering.lstrip("-") not in allowed:
+            ordering = getattr(view, "keyset_ordering", self.default_ordering)
+        return ordering.lstrip("-"), ordering.startswith("-")
+
+    def order_by(self, backwards):
+        descending = self.descending != backwards
+        prefix = "-" if descending else ""
+        return [f"{prefix}{self.field}", f"{prefix}pk"]
+
+    def position_filter(self, value, pk, backwards):
+        lookup = "lt" if self.descending != backwards else "gt"
+        return Q(**{f"{self.field}__{lookup}": value}) | Q(
+            **{self.field: value, f"pk__{lookup}": pk}
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.build_link(self.page[-1], "next")
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.build_link(self.page[0], "prev")
+
+    def build_link(self, obj, direction):
+        url = remove_query_param(self.request.build_absolute_uri(), "page")
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(obj, direction))
+
+    def encode_cursor(self, obj, direction):
+        value = getattr(obj, self.field)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+
+        payload = json.dumps({"v": value, "pk": obj.pk, "d": direction}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if cursor["d"] not in ("next", "prev") or "v" not in cursor:
+                raise ValueError
+            int(cursor["pk"])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+
+class CatalogPagination(PageNumberPagination):
+    django_paginator_class = CachedCountPaginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        sliced = getattr(getattr(queryset, "query", None), "is_sliced", True)
+        if KeysetPagination.is_requested(request) and not sliced:
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
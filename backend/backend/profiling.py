@@ -0,0 +1,98 @@
+import cProfile
+import os
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_KINDS = ("cpu", "memory")
+PROFILE_EXTENSIONS = {"cpu": "prof", "memory": "folded"}
+PROFILE_NAME_RE = re.compile(r"^[\w.-]+\.(prof|folded)$")
+
+
+def profile_dir():
+    return Path(settings.PROFILE_DIR)
+
+
+def profile_path(name):
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
+
+
+def list_profiles():
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(
+        (path for path in directory.iterdir() if PROFILE_NAME_RE.match(path.name)),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+
+
+def _prune():
+    cutoff = time.time() - settings.PROFILE_MAX_AGE
+    for index, path in enumerate(list_profiles()):
+        if index >= settings.PROFILE_RETENTION or path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+
+
+def _new_path(kind, request):
+    slug = re.sub(r"[^\w-]+", "-", request.path).strip("-")[:60] or "root"
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{stamp}-{kind}-{request.method.lower()}-{slug}.{PROFILE_EXTENSIONS[kind]}"
+
+
+def _frame_label(frame):
+    filename = frame.filename
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f"{filename}:{frame.lineno}"
+
+
+def profile_cpu(request, get_response):
+    profiler = cProfile.Profile()
+    response = profiler.runcall(get_response, request)
+
+    # Binary pstats output: snakeviz opens it directly and flameprof turns it
+    # into a flamegraph.
+    path = _new_path("cpu", request)
+    profiler.dump_stats(path)
+    _prune()
+    return response, path
+
+
+def profile_memory(request, get_response):
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(settings.PROFILE_MEMORY_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        response = get_response(request)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    # Memory still held when the response is returned, one line per
+    # allocation stack in the collapsed format flamegraph.pl and speedscope
+    # read. Tracebacks run from the outermost frame in.
+    ignored = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    stats = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "traceback")
+    path = _new_path("memory", request)
+    with open(path, "w") as output:
+        for stat in stats:
+            if stat.size_diff > 0:
+                stack = ";".join(_frame_label(frame) for frame in stat.traceback)
+                output.write(f"{stack} {stat.size_diff}\n")
+    _prune()
+    return response, path
@@ -53,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +62,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'backend.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -143,10 +145,58 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "backend.pagination.CatalogPagination",
     "PAGE_SIZE": 9,
 }
 
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+
+HOME_CACHE_FRESH_SECONDS = 60
+HOME_CACHE_TIMEOUT = 60 * 60 * 24
+FACETS_CACHE_TIMEOUT = 60 * 10
+PRODUCT_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Most product ids a single wishlist lookup or bulk change may carry.
+WISHLIST_BATCH_LIMIT = 200
+
+# Most lines a single cart sync or batch request may change.
+CART_BATCH_LIMIT = 100
+
+# Seconds a started checkout keeps its units out of everyone else's reach.
+STOCK_HOLD_TTL = 60 * 15
+
+# Requests running more queries than this (or the view's query_budget) are
+# logged as warnings. With DEBUG on, the query that goes over raises instead
+# of running.
+QUERY_BUDGET = 50
+QUERY_BUDGET_RAISE = True
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "backend.requests": {
+            "handlers": ["console"],
+            "level": os.getenv("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
+# Staff can profile a single request with an "X-Profile: cpu|memory" header
+# or a "?_profile=cpu|memory" parameter. Only the newest dumps are kept.
+PROFILE_DIR = os.getenv("PROFILE_DIR", BASE_DIR / "profiles")
+PROFILE_RETENTION = 50
+PROFILE_MAX_AGE = 60 * 60 * 24 * 7
+PROFILE_MEMORY_FRAMES = 30
+
+RELATED_PRODUCTS_TOP_K = 12
+RELATED_PRODUCTS_DIMENSIONS = 256
+RELATED_PRODUCTS_LIVE_UPDATES = True
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -158,6 +208,7 @@ SIMPLE_JWT = {
 AUTH_USER_MODEL = 'users.User'
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_EXPOSE_HEADERS = ["Server-Timing", "X-Profile", "X-Profile-URL"]
 
 EMAIL_BACKEND = os.getenv("EMAIL_BACKEND")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
@@ -170,3 +221,6 @@ AUTHENTICATION_BACKENDS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+IMAGE_VARIANT_WIDTHS = (160, 480, 1024)
+IMAGE_VARIANT_WORKERS = 2
+
@@ -0,0 +1,39 @@
+import re
+from django.db import connection
+
+SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+class QueryPlanAssertionsMixin:
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScan(self, queryset, allowed=()):
+        plan = self.query_plan(queryset)
+        tables = set(connection.introspection.table_names())
+        scans = [
+            match.group(1)
+            for match in map(SCAN_RE.match, plan)
+            if match and match.group(1) in tables and match.group(1) not in allowed
+        ]
+        self.assertFalse(
+            scans,
+            f"Full table scan of {', '.join(scans)}:\n" + "\n".join(plan),
+        )
+
+    def assertNoTempSort(self, queryset):
+        plan = self.query_plan(queryset)
+        self.assertFalse(
+            any("USE TEMP B-TREE FOR ORDER BY" in step for step in plan),
+            "Sort needs a temporary B-tree:\n" + "\n".join(plan),
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.query_plan(queryset)
+        self.assertTrue(
+            any(index_name in step for step in plan),
+            f"{index_name} is not used:\n" + "\n".join(plan),
+        )
@@ -0,0 +1,60 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from rest_framework.serializers import BaseSerializer
+
+_timer = ContextVar("serializer_timer", default=None)
+
+
+class SerializerTimer:
+    def __init__(self):
+        self.depth = 0
+        self.duration = 0.0
+        self.query_duration = 0.0
+
+    @property
+    def active(self):
+        return self.depth > 0
+
+
+def current_serializer_timer():
+    return _timer.get()
+
+
+@contextmanager
+def serializer_timer():
+    timer = SerializerTimer()
+    token = _timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _timer.reset(token)
+
+
+def _timed(data):
+    # Only the outermost .data is timed, so serializers reading another
+    # serializer's .data are not counted twice.
+    @wraps(data)
+    def wrapper(serializer):
+        timer = _timer.get()
+        if timer is None or timer.active:
+            return data(serializer)
+
+        timer.depth += 1
+        started = time.perf_counter()
+        try:
+            return data(serializer)
+        finally:
+            timer.duration += time.perf_counter() - started
+            timer.depth -= 1
+
+    wrapper.timed = True
+    return wrapper
+
+
+# Serializer.data and ListSerializer.data both end in BaseSerializer.data,
+# so timing it there covers every serializer without each opting in.
+def install_serializer_timing():
+    if not getattr(BaseSerializer.data.fget, "timed", False):
+        BaseSerializer.data = property(_timed(BaseSerializer.data.fget))
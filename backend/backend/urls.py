@@ -6,6 +6,7 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from .views import ProfileDownloadView, ProfileListView
 
 
 urlpatterns = [
@@ -16,6 +17,8 @@ urlpatterns = [
     path("api/", include("products.urls")),
     path("api/", include("cart.urls")),
     path("api/", include("orders.urls")),
+    path("api/profiles/", ProfileListView.as_view()),
+    path("api/profiles/<str:name>/", ProfileDownloadView.as_view(), name="profile-download"),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from django.http import FileResponse, Http404
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .profiling import list_profiles, profile_path
+
+
+class ProfileListView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response([
+            {
+                "name": path.name,
+                "size": path.stat().st_size,
+                "created_at": datetime.fromtimestamp(path.stat().st_mtime, timezone.utc),
+                "url": request.build_absolute_uri(f"{path.name}/"),
+            }
+            for path in list_profiles()
+        ])
+
+
+class ProfileDownloadView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name):
+        path = profile_path(name)
+        if path is None:
+            raise Http404
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=name)
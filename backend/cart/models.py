@@ -8,6 +8,9 @@ class Cart(models.Model):
         on_delete=models.CASCADE
     )
     updated_at = models.DateTimeField(auto_now=True)
+    # Kept in sync with the items by cart.utils.touch_cart().
+    item_count = models.PositiveIntegerField(default=0)
+    total_quantity = models.PositiveIntegerField(default=0)
 
 class CartItem(models.Model):
     cart = models.ForeignKey(
@@ -1,10 +1,14 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from backend.images import variant_srcset
 from .models import Cart, CartItem
 
+# Reads the annotations added by utils.cart_lines().
 class CartItemSerializer(serializers.ModelSerializer):
-    product_title = serializers.CharField(source="product.title", read_only=True)
+    product_title = serializers.CharField(read_only=True)
     price = serializers.DecimalField(
-        source="product.final_price",
+        source="unit_price",
         max_digits=10,
         decimal_places=2,
         read_only=True
@@ -24,8 +28,77 @@ class CartItemSerializer(serializers.ModelSerializer):
 
     def get_image(self, obj):
         request = self.context.get("request")
-        img = obj.product.images.first()
+        if obj.image_name and request:
+            return request.build_absolute_uri(default_storage.url(obj.image_name))
 
-        if img and request:
-            return request.build_absolute_uri(img.image.url)
 
+class CartSummaryItemSerializer(CartItemSerializer):
+    list_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    discount = serializers.IntegerField(read_only=True)
+    line_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    line_discount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    stock = serializers.IntegerField(read_only=True)
+    available = serializers.BooleanField(read_only=True)
+    srcset = serializers.SerializerMethodField()
+
+    class Meta(CartItemSerializer.Meta):
+        fields = CartItemSerializer.Meta.fields + (
+            "srcset",
+            "list_price",
+            "discount",
+            "line_total",
+            "line_discount",
+            "stock",
+            "available",
+        )
+
+    def get_srcset(self, obj):
+        return variant_srcset(obj.image_variants, self.context.get("request"))
+
+
+class CartSummarySerializer(serializers.Serializer):
+    items = CartSummaryItemSerializer(many=True)
+    item_count = serializers.IntegerField()
+    total_quantity = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    discount_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    available = serializers.BooleanField()
+
+
+class CartQuantitySerializer(serializers.Serializer):
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class CartLineSerializer(CartQuantitySerializer):
+    product_id = serializers.IntegerField(min_value=1)
+
+
+class CartSyncSerializer(serializers.Serializer):
+    items = CartLineSerializer(many=True, max_length=settings.CART_BATCH_LIMIT)
+
+
+class CartBatchSerializer(serializers.Serializer):
+    add = CartLineSerializer(many=True, required=False, default=list)
+    update = CartLineSerializer(many=True, required=False, default=list)
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        default=list,
+    )
+
+    def validate(self, attrs):
+        product_ids = (
+            [line["product_id"] for line in attrs["add"]]
+            + [line["product_id"] for line in attrs["update"]]
+            + attrs["remove"]
+        )
+        if not product_ids:
+            raise serializers.ValidationError("Nothing to change.")
+        if len(product_ids) > settings.CART_BATCH_LIMIT:
+            raise serializers.ValidationError(
+                f"A batch may change at most {settings.CART_BATCH_LIMIT} lines."
+            )
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError("Each product may appear only once per batch.")
+        return attrs
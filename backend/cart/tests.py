@@ -1,3 +1,273 @@
+from decimal import Decimal
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from orders.models import Order, OrderItem
+from products.models import Product, ProductImage
+from users.models import User
+from .models import Cart, CartItem
+from .utils import apply_cart_changes
 
-# Create your tests here.
+ORDER_DETAILS = {
+    "full_name": "Test Buyer",
+    "address": "1 Test Street",
+    "city": "Cairo",
+    "phone": "01000000000",
+    "payment_method": "cash",
+}
+
+
+class CartTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create(email="seller@test.com", username="seller", is_seller=True)
+        cls.buyer = User.objects.create(email="buyer@test.com", username="buyer")
+
+    @classmethod
+    def create_products(cls, count, price="10.00", discount=0):
+        return Product.objects.bulk_create([
+            Product(
+                seller=cls.seller,
+                title=f"Product {i}",
+                description="",
+                price=Decimal(price),
+                discount=discount,
+                stock=100,
+                is_approved=True,
+            )
+            for i in range(count)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+
+# Halfway cases, where rounding the discounted price half up and half even
+# (or truncating) disagree.
+HALF_CENT_PRICES = [
+    ("19.99", 15, "16.99"),
+    ("0.05", 50, "0.03"),
+    ("0.10", 5, "0.10"),
+    ("10.01", 50, "5.01"),
+    ("33.33", 30, "23.33"),
+    ("12.50", 0, "12.50"),
+]
+
+
+class CartMoneyTests(CartTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.products = [
+            cls.create_products(1, price=price, discount=discount)[0]
+            for price, discount, _ in HALF_CENT_PRICES
+        ]
+
+    def fill_cart(self, quantity=3):
+        apply_cart_changes(self.buyer, add={product.pk: quantity for product in self.products})
+
+    def test_final_price_rounds_half_up_to_cents(self):
+        for product, (_, _, expected) in zip(self.products, HALF_CENT_PRICES):
+            self.assertEqual(product.final_price(), Decimal(expected))
+
+    def test_cart_totals_match_final_price(self):
+        self.fill_cart(quantity=3)
+
+        summary = self.client.get("/api/cart/summary/").data
+
+        lines = {line["product"]: line for line in summary["items"]}
+        for product in self.products:
+            line = lines[product.pk]
+            self.assertEqual(Decimal(line["price"]), product.final_price())
+            self.assertEqual(Decimal(line["line_total"]), product.final_price() * 3)
+        total = sum(product.final_price() * 3 for product in self.products)
+        self.assertEqual(Decimal(summary["total"]), total)
+        self.assertEqual(
+            Decimal(summary["subtotal"]) - Decimal(summary["discount_total"]),
+            Decimal(summary["total"]),
+        )
+
+    def test_order_prices_match_final_price(self):
+        self.fill_cart(quantity=2)
+
+        response = self.client.post("/api/orders/create/", ORDER_DETAILS, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        prices = dict(
+            OrderItem.objects.filter(order=response.data["order_id"]).values_list("product_id", "price")
+        )
+        for product in self.products:
+            self.assertEqual(prices[product.pk], product.final_price())
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.total_price, sum(product.final_price() * 2 for product in self.products))
+
+
+class CartSummaryTests(CartTestCase):
+    def test_query_count_does_not_grow_with_cart(self):
+        products = self.create_products(30, discount=10)
+        ProductImage.objects.bulk_create([
+            ProductImage(product=product, image=f"products/{product.pk}.png") for product in products
+        ])
+
+        counts = []
+        for size in (1, 30):
+            CartItem.objects.filter(cart__user=self.buyer).delete()
+            apply_cart_changes(self.buyer, add={product.pk: 1 for product in products[:size]})
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/api/cart/summary/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["items"]), size)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+class CartBatchTests(CartTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.products = cls.create_products(30)
+
+    def quantities(self):
+        return dict(CartItem.objects.filter(cart__user=self.buyer).values_list("product_id", "quantity"))
+
+    def batch(self, **changes):
+        return self.client.post("/api/cart/batch/", changes, format="json")
+
+    def test_add_goes_on_top_of_existing_line(self):
+        first, second = self.products[:2]
+        apply_cart_changes(self.buyer, add={first.pk: 2})
+
+        response = self.batch(add=[
+            {"product_id": first.pk, "quantity": 3},
+            {"product_id": second.pk, "quantity": 1},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {first.pk: 5, second.pk: 1})
+
+    def test_update_and_remove(self):
+        first, second, third = self.products[:3]
+        apply_cart_changes(self.buyer, add={first.pk: 2, second.pk: 2})
+
+        response = self.batch(
+            update=[{"product_id": first.pk, "quantity": 7}, {"product_id": third.pk, "quantity": 1}],
+            remove=[second.pk],
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {first.pk: 7, third.pk: 1})
+
+    def test_product_in_more_than_one_list_is_rejected(self):
+        first, second = self.products[:2]
+        apply_cart_changes(self.buyer, add={first.pk: 1})
+
+        for changes in (
+            {"add": [{"product_id": second.pk, "quantity": 1}], "remove": [second.pk]},
+            {"update": [{"product_id": first.pk, "quantity": 2}], "remove": [first.pk]},
+            {"add": [{"product_id": first.pk, "quantity": 1}, {"product_id": first.pk, "quantity": 1}]},
+        ):
+            with self.subTest(changes=changes):
+                self.assertEqual(self.batch(**changes).status_code, 400)
+                self.assertEqual(self.quantities(), {first.pk: 1})
+
+    def test_unknown_product_fails_the_batch(self):
+        first = self.products[0]
+
+        response = self.batch(add=[
+            {"product_id": first.pk, "quantity": 1},
+            {"product_id": 999999, "quantity": 1},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.quantities(), {})
+
+    def test_unknown_product_is_skipped_on_sync(self):
+        first = self.products[0]
+        apply_cart_changes(self.buyer, add={first.pk: 1})
+
+        response = self.client.post(
+            "/api/cart/sync/",
+            {"items": [{"product_id": first.pk, "quantity": 2}, {"product_id": 999999, "quantity": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["skipped"], [999999])
+        self.assertEqual(self.quantities(), {first.pk: 3})
+
+    def test_query_count_does_not_grow_with_batch(self):
+        counts = []
+        for size in (1, 30):
+            CartItem.objects.filter(cart__user=self.buyer).delete()
+            apply_cart_changes(self.buyer, add={product.pk: 1 for product in self.products[:size]})
+            changes = {
+                "add": [{"product_id": product.pk, "quantity": 1} for product in self.products[:size]],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.batch(**changes)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(self.quantities().values()), {2})
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+class CartCountTests(CartTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.products = cls.create_products(3)
+
+    def counters(self):
+        return Cart.objects.values_list("item_count", "total_quantity").get(user=self.buyer)
+
+    def count(self, **headers):
+        return self.client.get("/api/cart/count/", **headers)
+
+    def test_counters_follow_mutations(self):
+        first, second, _ = self.products
+
+        self.client.post("/api/cart/", {"product_id": first.pk, "quantity": 2}, format="json")
+        self.client.post("/api/cart/", {"product_id": second.pk, "quantity": 1}, format="json")
+        self.assertEqual(self.counters(), (2, 3))
+
+        item = CartItem.objects.get(cart__user=self.buyer, product=first)
+        self.client.put(f"/api/cart/item/{item.pk}/update/", {"quantity": 5}, format="json")
+        self.assertEqual(self.counters(), (2, 6))
+
+        self.client.delete(f"/api/cart/item/{item.pk}/")
+        self.assertEqual(self.counters(), (1, 1))
+        self.assertEqual(self.count().data, {"count": 1})
+
+        response = self.client.post("/api/orders/create/", ORDER_DETAILS, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counters(), (0, 0))
+        self.assertEqual(self.count().data, {"count": 0})
+
+    def test_user_without_cart(self):
+        with self.assertNumQueries(1):
+            response = self.count()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"count": 0})
+        self.assertFalse(Cart.objects.filter(user=self.buyer).exists())
+
+    def test_conditional_get(self):
+        apply_cart_changes(self.buyer, add={self.products[0].pk: 1})
+
+        response = self.count()
+        etag = response["ETag"]
+        self.assertEqual(response.data, {"count": 1})
+
+        repeat = self.count(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat["ETag"], etag)
+
+        apply_cart_changes(self.buyer, add={self.products[1].pk: 2})
+        changed = self.count(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        self.assertEqual(changed.data, {"count": 3})
@@ -0,0 +1,121 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import BooleanField, Count, DecimalField, ExpressionWrapper, F, IntegerField, JSONField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+from products.models import Product, ProductImage, held_stock
+from .models import Cart, CartItem
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def refresh_cart_counts(carts):
+    # A single UPDATE recounts the lines from the items table, so the
+    # counters stay right even when mutations race each other.
+    items = CartItem.objects.filter(cart=OuterRef("pk")).values("cart")
+    carts.update(
+        item_count=Coalesce(Subquery(items.annotate(value=Count("id")).values("value")), 0),
+        total_quantity=Coalesce(Subquery(items.annotate(value=Sum("quantity")).values("value")), 0),
+        updated_at=timezone.now(),
+    )
+
+
+def touch_cart(user):
+    refresh_cart_counts(Cart.objects.filter(user=user))
+
+
+def unknown_products(product_ids):
+    known = Product.objects.filter(id__in=product_ids, is_approved=True).values_list("id", flat=True)
+    return sorted(set(product_ids) - set(known))
+
+
+def unit_price():
+    # Product.final_price() in SQL. It works in whole cents and rounds half up
+    # with integer division, so the result matches the Python Decimal to the
+    # cent on every backend and line totals add up to the cart total.
+    cents = Cast(Round(F("product__price") * Value(100)), IntegerField())
+    discounted = (cents * (Value(100) - F("product__discount")) + Value(50)) / Value(100)
+    return ExpressionWrapper(discounted * Value(Decimal("0.01")), output_field=MONEY)
+
+
+# One row per cart line with prices, totals, stock and the first product
+# image computed in the database, so the cost of reading a cart does not grow
+# with the number of lines.
+def cart_lines(user):
+    first_image = ProductImage.objects.filter(product=OuterRef("product")).order_by("id")
+    return (
+        CartItem.objects
+        .filter(cart__user=user)
+        .annotate(
+            product_title=F("product__title"),
+            list_price=F("product__price"),
+            discount=F("product__discount"),
+            unit_price=unit_price(),
+            line_total=ExpressionWrapper(F("unit_price") * F("quantity"), output_field=MONEY),
+            line_discount=ExpressionWrapper(
+                (F("list_price") - F("unit_price")) * F("quantity"), output_field=MONEY
+            ),
+            # What this user can still buy: stock less other users' holds.
+            stock=F("product__stock") - held_stock("product", exclude_user=user),
+            available=ExpressionWrapper(
+                Q(product__is_approved=True, stock__gte=F("quantity")),
+                output_field=BooleanField(),
+            ),
+            image_name=Subquery(first_image.values("image")[:1]),
+            image_variants=Subquery(first_image.values("variants")[:1], output_field=JSONField()),
+        )
+        .order_by("id")
+    )
+
+
+def cart_summary(lines):
+    lines = list(lines)
+    total = sum((line.line_total for line in lines), MONEY.to_python(0))
+    discount_total = sum((line.line_discount for line in lines), MONEY.to_python(0))
+    return {
+        "items": lines,
+        "item_count": len(lines),
+        "total_quantity": sum(line.quantity for line in lines),
+        "subtotal": total + discount_total,
+        "discount_total": discount_total,
+        "total": total,
+        "available": all(line.available for line in lines),
+    }
+
+
+# add and update map product ids to quantities; add is on top of what is in
+# the cart already, update replaces it. Each product may appear in only one
+# of add, update and remove. The whole batch runs in a fixed number of
+# statements, however many lines it carries.
+def apply_cart_changes(user, add=None, update=None, remove=()):
+    add = add or {}
+    update = update or {}
+
+    with transaction.atomic():
+        cart, _ = Cart.objects.select_for_update().get_or_create(user=user)
+
+        quantities = dict(update)
+        if add:
+            existing = dict(
+                CartItem.objects
+                .filter(cart=cart, product_id__in=add)
+                .values_list("product_id", "quantity")
+            )
+            for product_id, quantity in add.items():
+                quantities[product_id] = existing.get(product_id, 0) + quantity
+
+        if quantities:
+            CartItem.objects.bulk_create(
+                [
+                    CartItem(cart=cart, product_id=product_id, quantity=quantity)
+                    for product_id, quantity in quantities.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["cart", "product"],
+                update_fields=["quantity"],
+            )
+        if remove:
+            CartItem.objects.filter(cart=cart, product_id__in=remove).delete()
+
+        refresh_cart_counts(Cart.objects.filter(pk=cart.pk))
+    return cart
@@ -3,78 +3,133 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import Cart, CartItem
-from products.models import Product
 from rest_framework import status
-from .serializers import CartItemSerializer
+from backend.conditional import conditional_get
+from rest_framework.exceptions import NotFound, ValidationError
+from django.db import transaction
+from .serializers import (
+    CartBatchSerializer,
+    CartItemSerializer,
+    CartLineSerializer,
+    CartQuantitySerializer,
+    CartSummarySerializer,
+    CartSyncSerializer,
+)
+from .utils import apply_cart_changes, cart_lines, cart_summary, touch_cart, unknown_products
+
+
+# The row is kept on the view so that CartCountView answers from the same
+# single read that produced the validators.
+def cart_stamp(view, request):
+    view.cart_row = (
+        Cart.objects
+        .filter(user=request.user)
+        .values_list("pk", "updated_at", "total_quantity")
+        .first()
+    )
+    if view.cart_row is None:
+        return None
+    return ":".join(str(value) for value in view.cart_row), view.cart_row[1]
 
 class SyncCartView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
+        serializer = CartSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        for item in request.data.get("items", []):
-            product = Product.objects.get(id=item["product_id"])
-            cart_item, created = CartItem.objects.get_or_create(
-                cart=cart,
-                product=product
-            )
+        add = {}
+        for line in serializer.validated_data["items"]:
+            add[line["product_id"]] = add.get(line["product_id"], 0) + line["quantity"]
 
-            if created:
-                cart_item.quantity = item["quantity"]
-            else:
-                cart_item.quantity += item["quantity"]
+        # Products removed since they were put in the guest cart are dropped
+        # rather than failing the login that triggers the sync.
+        skipped = unknown_products(add)
+        for product_id in skipped:
+            del add[product_id]
 
-            cart_item.save()
+        apply_cart_changes(request.user, add=add)
+        return Response({"detail": "Cart synced", "skipped": skipped})
 
-        return Response({"detail": "Cart synced"})
+
+class CartBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 10
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        add = {line["product_id"]: line["quantity"] for line in data["add"]}
+        update = {line["product_id"]: line["quantity"] for line in data["update"]}
+        missing = unknown_products([*add, *update])
+        if missing:
+            raise ValidationError({"product_id": [f"Unknown product ids: {missing}"]})
+
+        apply_cart_changes(request.user, add=add, update=update, remove=data["remove"])
+        return Response({"detail": "Cart updated"})
 
 class CartView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        serializer = CartItemSerializer(cart.items.all(), many=True, context={"request": request})
+        serializer = CartItemSerializer(cart_lines(request.user), many=True, context={"request": request})
         return Response(serializer.data)
 
     def post(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        product = Product.objects.get(id=request.data["product_id"])
+        serializer = CartLineSerializer(data={
+            "product_id": request.data.get("product_id"),
+            "quantity": request.data.get("quantity", 1),
+        })
+        serializer.is_valid(raise_exception=True)
+        product_id = serializer.validated_data["product_id"]
+        if unknown_products([product_id]):
+            raise NotFound("Product not found")
+
+        apply_cart_changes(request.user, add={product_id: serializer.validated_data["quantity"]})
+        return Response({"detail": "Item added"})
 
-        item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product
-        )
 
-        if not created:
-            item.quantity += 1
-        item.save()
 
-        return Response({"detail": "Item added"})
+class CartSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 3
 
+    def get(self, request):
+        summary = cart_summary(cart_lines(request.user))
+        return Response(CartSummarySerializer(summary, context={"request": request}).data)
 
 
 class CartItemDeleteView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, item_id):
-        item = CartItem.objects.get(id=item_id, cart__user=request.user)
-        item.delete()
+        with transaction.atomic():
+            deleted, _ = CartItem.objects.filter(id=item_id, cart__user=request.user).delete()
+            if not deleted:
+                raise NotFound("Cart item not found")
+            touch_cart(request.user)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 class CartItemUpdateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def put(self, request, item_id):
-        item = CartItem.objects.get(id=item_id, cart__user=request.user)
-        item.quantity = request.data["quantity"]
-        item.save()
+        serializer = CartQuantitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantity = serializer.validated_data["quantity"]
+
+        with transaction.atomic():
+            updated = CartItem.objects.filter(id=item_id, cart__user=request.user).update(quantity=quantity)
+            if not updated:
+                raise NotFound("Cart item not found")
+            touch_cart(request.user)
         return Response({"detail": "Updated"})
 
 class CartCountView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @conditional_get(cart_stamp, vary=["Authorization"])
     def get(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        count = sum(item.quantity for item in cart.items.all())
-        return Response({"count": count})
\ No newline at end of file
+        return Response({"count": self.cart_row[2] if self.cart_row else 0})
\ No newline at end of file
@@ -0,0 +1,167 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from cart.models import Cart, CartItem
+from cart.utils import cart_lines, refresh_cart_counts
+from products.models import Product, StockHold, held_stock
+from .models import Order, OrderItem
+from .stats import record_sales
+
+
+class EmptyCart(Exception):
+    pass
+
+
+class OutOfStock(Exception):
+    def __init__(self, lines):
+        super().__init__("Not enough stock")
+        self.lines = lines
+
+
+def _per_product(quantities):
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def take_stock(quantities, user):
+    # One conditional UPDATE takes the stock for every line, leaving room for
+    # the units other users hold. A row that cannot cover its quantity is
+    # left alone, so a short update count means some line is oversold. The
+    # check and the decrement are one statement, so concurrent buyers cannot
+    # both win; this is the only guard against overselling, no rows are
+    # locked beforehand. Callers must roll back when this fails.
+    updated = (
+        Product.objects
+        .filter(pk__in=quantities, is_approved=True)
+        .alias(held=held_stock("pk", exclude_user=user))
+        .filter(stock__gte=_per_product(quantities) + F("held"))
+        .update(stock=F("stock") - _per_product(quantities), updated_at=timezone.now())
+    )
+    return updated == len(quantities)
+
+
+def shortages(quantities, user):
+    products = (
+        Product.objects
+        .filter(pk__in=quantities)
+        .with_available_stock(exclude_user=user)
+        .values("pk", "title", "is_approved", "available_stock")
+    )
+    lines = {
+        product["pk"]: {
+            "product": product["pk"],
+            "product_title": product["title"],
+            "requested": quantities[product["pk"]],
+            "available": max(product["available_stock"], 0) if product["is_approved"] else 0,
+        }
+        for product in products
+    }
+    return [
+        lines.get(product_id, {"product": product_id, "requested": quantity, "available": 0})
+        for product_id, quantity in quantities.items()
+        if product_id not in lines or lines[product_id]["available"] < quantity
+    ]
+
+
+# Sets the cart's units aside for STOCK_HOLD_TTL seconds, replacing any
+# holds from an earlier start. Raises EmptyCart, or OutOfStock listing the
+# lines that other buyers' stock and holds leave no room for.
+#
+# Holds are checked, not locked: two checkouts starting at the same moment
+# can both be granted the last units. Nothing is oversold then, because
+# place_order() only takes stock through take_stock()'s conditional UPDATE;
+# the later buyer gets OutOfStock there instead of here.
+def hold_cart(user):
+    with transaction.atomic():
+        quantities = dict(
+            CartItem.objects.filter(cart__user=user).values_list("product_id", "quantity")
+        )
+        if not quantities:
+            raise EmptyCart()
+
+        missing = shortages(quantities, user)
+        if missing:
+            raise OutOfStock(missing)
+
+        expires_at = timezone.now() + timedelta(seconds=settings.STOCK_HOLD_TTL)
+        StockHold.objects.filter(user=user).exclude(product_id__in=quantities).delete()
+        StockHold.objects.bulk_create(
+            [
+                StockHold(user=user, product_id=product_id, quantity=quantity, expires_at=expires_at)
+                for product_id, quantity in quantities.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["user", "product"],
+            update_fields=["quantity", "expires_at"],
+        )
+    return expires_at
+
+
+def release_holds(user):
+    StockHold.objects.filter(user=user).delete()
+
+
+# Turns the user's cart into an order in one transaction and a fixed number
+# of statements, whatever the number of lines. The user's holds are
+# converted: their units are taken from stock and the holds dropped. Raises
+# EmptyCart or OutOfStock; nothing is written in either case.
+def place_order(user, details):
+    with transaction.atomic():
+        cart = Cart.objects.filter(user=user).first()
+        lines = list(cart_lines(user).select_related("product")) if cart else []
+        if not lines:
+            raise EmptyCart()
+
+        quantities = {line.product_id: line.quantity for line in lines}
+        if not take_stock(quantities, user):
+            raise OutOfStock(shortages(quantities, user))
+
+        order = Order.objects.create(
+            user=user,
+            total_price=sum(line.line_total for line in lines),
+            stock_deducted=True,
+            **details,
+        )
+        order_items = OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=line.product,
+                seller_id=line.product.seller_id,
+                quantity=line.quantity,
+                price=line.unit_price,
+            )
+            for line in lines
+        ])
+        record_sales(order_items)
+
+        release_holds(user)
+        CartItem.objects.filter(cart=cart).delete()
+        refresh_cart_counts(Cart.objects.filter(pk=cart.pk))
+    return order
+
+
+# For orders placed before stock was taken at checkout.
+def deduct_order_stock(order):
+    quantities = {}
+    for product_id, quantity in order.items.values_list("product_id", "quantity"):
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    with transaction.atomic():
+        if not take_stock(quantities, order.user_id):
+            raise OutOfStock(shortages(quantities, order.user_id))
+        Order.objects.filter(pk=order.pk).update(stock_deducted=True)
+    order.stock_deducted = True
+
+
+# Moves an order to new_status, taking its stock first if it leaves PENDING
+# without it. Raises OutOfStock, leaving the order unchanged.
+def set_order_status(order, new_status):
+    with transaction.atomic():
+        if new_status != "PENDING" and not order.stock_deducted:
+            deduct_order_stock(order)
+        order.status = new_status
+        order.save(update_fields=["status"])
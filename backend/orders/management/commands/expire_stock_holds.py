@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand
+from products.models import StockHold
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Delete expired stock holds. Run it from cron; expired holds are ignored until then."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            type=int,
+            metavar="SECONDS",
+            help="Keep running, sweeping every SECONDS seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.sweep()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired stock holds."))
+            if not options["loop"]:
+                return
+            time.sleep(options["loop"])
+
+    def sweep(self):
+        # Small batches keep each delete's write lock short.
+        deleted = 0
+        while True:
+            ids = list(StockHold.objects.expired().values_list("id", flat=True)[:BATCH_SIZE])
+            if not ids:
+                return deleted
+            deleted += StockHold.objects.filter(id__in=ids).delete()[0]
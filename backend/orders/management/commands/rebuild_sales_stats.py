@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from orders.stats import rebuild_sales_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-product and per-category sales rollups from order items."
+
+    def handle(self, *args, **options):
+        products, categories = rebuild_sales_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt sales stats for {products} products and {categories} categories.")
+        )
@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-18 11:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import DecimalField, F, Sum
+
+
+def backfill_sales_stats(apps, schema_editor):
+    OrderItem = apps.get_model("orders", "OrderItem")
+    ProductSalesStats = apps.get_model("orders", "ProductSalesStats")
+    CategorySalesStats = apps.get_model("orders", "CategorySalesStats")
+    revenue = Sum(F("price") * F("quantity"), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+    for model, key, group_by in (
+        (ProductSalesStats, "product_id", "product"),
+        (CategorySalesStats, "category_id", "product__category"),
+    ):
+        rows = (
+            OrderItem.objects
+            .values(key=F(group_by))
+            .annotate(units=Sum("quantity"), revenue=revenue)
+        )
+        model.objects.bulk_create(
+            model(**{key: row["key"]}, units_sold=row["units"], revenue=row["revenue"])
+            for row in rows
+            if row["key"] is not None
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_stock_deducted'),
+        ('products', '0010_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySalesStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_stats', serialize=False, to='products.category')),
+                ('units_sold', models.PositiveIntegerField(db_index=True, default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductSalesStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_stats', serialize=False, to='products.product')),
+                ('units_sold', models.PositiveIntegerField(db_index=True, default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+        ),
+        migrations.RunPython(backfill_sales_stats, migrations.RunPython.noop),
+    ]
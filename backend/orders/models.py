@@ -1,6 +1,6 @@
 from django.conf import settings
 from django.db import models
-from products.models import Product
+from products.models import Product, Category
 
 class Order(models.Model):
     STATUS_CHOICES = [
@@ -32,6 +32,12 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     stock_deducted = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="order_user_created_idx"),
+            models.Index(fields=["created_at"], name="order_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.id}"
 
@@ -48,3 +54,30 @@ class OrderItem(models.Model):
     )
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["seller", "order"], name="orderitem_seller_order_idx"),
+        ]
+
+
+class ProductSalesStats(models.Model):
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="sales_stats"
+    )
+    units_sold = models.PositiveIntegerField(default=0, db_index=True)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+
+class CategorySalesStats(models.Model):
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="sales_stats"
+    )
+    units_sold = models.PositiveIntegerField(default=0, db_index=True)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
@@ -46,6 +46,17 @@ class OrderSerializer(serializers.ModelSerializer):
             "items",
         )
 
+class CheckoutSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Order
+        fields = (
+            "full_name",
+            "address",
+            "city",
+            "phone",
+            "payment_method",
+        )
+
 class SellerOrderItemSerializer(serializers.ModelSerializer):
     product_title = serializers.CharField(source="product.title", read_only=True)
 
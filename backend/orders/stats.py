@@ -0,0 +1,77 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, Value, When
+from .models import OrderItem, ProductSalesStats, CategorySalesStats
+
+BATCH_SIZE = 1000
+
+
+def _increment(model, key, totals):
+    if not totals:
+        return
+
+    model.objects.bulk_create(
+        [model(**{key: pk}) for pk in totals],
+        ignore_conflicts=True,
+    )
+    model.objects.filter(**{f"{key}__in": list(totals)}).update(
+        units_sold=F("units_sold") + Case(
+            *[When(**{key: pk}, then=Value(units)) for pk, (units, _) in totals.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        revenue=F("revenue") + Case(
+            *[When(**{key: pk}, then=Value(revenue)) for pk, (_, revenue) in totals.items()],
+            default=Value(Decimal("0")),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    )
+
+
+def record_sales(order_items):
+    products = defaultdict(lambda: [0, Decimal("0")])
+    categories = defaultdict(lambda: [0, Decimal("0")])
+
+    for item in order_items:
+        revenue = item.price * item.quantity
+        products[item.product_id][0] += item.quantity
+        products[item.product_id][1] += revenue
+
+        if item.product.category_id is not None:
+            categories[item.product.category_id][0] += item.quantity
+            categories[item.product.category_id][1] += revenue
+
+    _increment(ProductSalesStats, "product_id", products)
+    _increment(CategorySalesStats, "category_id", categories)
+
+
+def _rebuild(model, key, rows):
+    model.objects.all().delete()
+    model.objects.bulk_create(
+        (
+            model(**{key: row["key"]}, units_sold=row["units"], revenue=row["revenue"])
+            for row in rows
+            if row["key"] is not None
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+@transaction.atomic
+def rebuild_sales_stats():
+    revenue = Sum(F("price") * F("quantity"), output_field=DecimalField(max_digits=12, decimal_places=2))
+    by_product = (
+        OrderItem.objects
+        .values(key=F("product"))
+        .annotate(units=Sum("quantity"), revenue=revenue)
+    )
+    by_category = (
+        OrderItem.objects
+        .values(key=F("product__category"))
+        .annotate(units=Sum("quantity"), revenue=revenue)
+    )
+
+    _rebuild(ProductSalesStats, "product_id", by_product)
+    _rebuild(CategorySalesStats, "category_id", by_category)
+    return ProductSalesStats.objects.count(), CategorySalesStats.objects.count()
@@ -1,3 +1,250 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from backend.testing import QueryPlanAssertionsMixin
+from cart.models import Cart, CartItem
+from cart.utils import refresh_cart_counts
+from products.models import Product, StockHold
+from users.models import User
+from .models import Order, OrderItem
 
-# Create your tests here.
+ORDER_DETAILS = {
+    "full_name": "Test Buyer",
+    "address": "1 Test Street",
+    "city": "Cairo",
+    "phone": "01000000000",
+    "payment_method": "cash",
+}
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class HotQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="plans@test.com", username="plans", is_seller=True)
+
+    def test_user_orders(self):
+        queryset = Order.objects.filter(user=self.user).order_by("-created_at")
+        self.assertNoFullScan(queryset)
+        self.assertNoTempSort(queryset)
+        self.assertUsesIndex(queryset, "order_user_created_idx")
+
+    def test_admin_orders(self):
+        queryset = Order.objects.order_by("-created_at")
+        self.assertNoTempSort(queryset)
+        self.assertUsesIndex(queryset, "order_created_idx")
+
+    def test_seller_orders(self):
+        queryset = Order.objects.filter(items__seller=self.user).distinct().order_by("-created_at")
+        self.assertNoFullScan(queryset)
+        self.assertUsesIndex(queryset, "orderitem_seller_order_idx")
+
+    def test_seller_order_items(self):
+        queryset = OrderItem.objects.filter(seller=self.user, order__in=[1, 2])
+        self.assertNoFullScan(queryset)
+
+
+class CheckoutTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create(email="seller@test.com", username="seller", is_seller=True)
+        cls.buyer = User.objects.create(email="buyer@test.com", username="buyer")
+        cls.products = [
+            Product.objects.create(
+                seller=cls.seller,
+                title=f"Product {i}",
+                description="",
+                price="10.00",
+                stock=5,
+                is_approved=True,
+            )
+            for i in range(6)
+        ]
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def fill_cart(self, user, quantities):
+        cart, _ = Cart.objects.get_or_create(user=user)
+        CartItem.objects.filter(cart=cart).delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product=product, quantity=quantity)
+            for product, quantity in quantities
+        ])
+        refresh_cart_counts(Cart.objects.filter(pk=cart.pk))
+        return cart
+
+    def stock(self, product):
+        return Product.objects.values_list("stock", flat=True).get(pk=product.pk)
+
+
+class PlaceOrderTests(CheckoutTestCase):
+    def place_order(self, user):
+        return self.client_for(user).post("/api/orders/create/", ORDER_DETAILS, format="json")
+
+    def test_takes_stock_and_marks_order_deducted(self):
+        cart = self.fill_cart(self.buyer, [(self.products[0], 2), (self.products[1], 1)])
+
+        response = self.place_order(self.buyer)
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertTrue(order.stock_deducted)
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(self.stock(self.products[0]), 3)
+        self.assertEqual(self.stock(self.products[1]), 4)
+        self.assertFalse(CartItem.objects.filter(cart=cart).exists())
+
+    def test_refuses_to_oversell(self):
+        cart = self.fill_cart(self.buyer, [(self.products[0], 1), (self.products[1], 6)])
+
+        response = self.place_order(self.buyer)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            [(line["product"], line["requested"], line["available"]) for line in response.data["lines"]],
+            [(self.products[1].pk, 6, 5)],
+        )
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertEqual(self.stock(self.products[0]), 5)
+        self.assertEqual(self.stock(self.products[1]), 5)
+        self.assertEqual(CartItem.objects.filter(cart=cart).count(), 2)
+
+    def test_empty_cart(self):
+        response = self.place_order(self.buyer)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_query_count_does_not_grow_with_cart(self):
+        counts = []
+        for size in (1, len(self.products)):
+            self.fill_cart(self.buyer, [(product, 1) for product in self.products[:size]])
+            with CaptureQueriesContext(connection) as queries:
+                response = self.place_order(self.buyer)
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+@override_settings(STOCK_HOLD_TTL=600)
+class StockHoldTests(CheckoutTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_buyer = User.objects.create(email="other@test.com", username="other")
+
+    def start_checkout(self, user):
+        return self.client_for(user).post("/api/orders/checkout/start/")
+
+    def place_order(self, user):
+        return self.client_for(user).post("/api/orders/create/", ORDER_DETAILS, format="json")
+
+    def test_start_holds_cart_lines(self):
+        self.fill_cart(self.buyer, [(self.products[0], 2), (self.products[1], 1)])
+
+        before = timezone.now()
+        response = self.start_checkout(self.buyer)
+
+        self.assertEqual(response.status_code, 200)
+        holds = StockHold.objects.filter(user=self.buyer)
+        self.assertEqual(
+            sorted(holds.values_list("product_id", "quantity")),
+            [(self.products[0].pk, 2), (self.products[1].pk, 1)],
+        )
+        for hold in holds:
+            self.assertGreaterEqual(hold.expires_at, before + timedelta(seconds=600))
+        self.assertEqual(self.stock(self.products[0]), 5)
+
+    def test_active_hold_blocks_other_buyers(self):
+        self.fill_cart(self.buyer, [(self.products[0], 4)])
+        self.fill_cart(self.other_buyer, [(self.products[0], 2)])
+        self.assertEqual(self.start_checkout(self.buyer).status_code, 200)
+
+        response = self.start_checkout(self.other_buyer)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["lines"][0]["available"], 1)
+
+        response = self.place_order(self.other_buyer)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.stock(self.products[0]), 5)
+
+    def test_expired_hold_is_ignored(self):
+        self.fill_cart(self.buyer, [(self.products[0], 4)])
+        self.fill_cart(self.other_buyer, [(self.products[0], 2)])
+        self.start_checkout(self.buyer)
+        StockHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.start_checkout(self.other_buyer).status_code, 200)
+        self.assertEqual(self.place_order(self.other_buyer).status_code, 201)
+        self.assertEqual(self.stock(self.products[0]), 3)
+
+    def test_place_order_converts_holds(self):
+        self.fill_cart(self.buyer, [(self.products[0], 5)])
+        self.start_checkout(self.buyer)
+
+        response = self.place_order(self.buyer)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.stock(self.products[0]), 0)
+        self.assertFalse(StockHold.objects.exists())
+
+    def test_expire_stock_holds_deletes_only_expired(self):
+        now = timezone.now()
+        expired = StockHold.objects.create(
+            user=self.buyer, product=self.products[0], quantity=1, expires_at=now - timedelta(seconds=1)
+        )
+        active = StockHold.objects.create(
+            user=self.other_buyer, product=self.products[0], quantity=1, expires_at=now + timedelta(minutes=5)
+        )
+
+        call_command("expire_stock_holds", stdout=StringIO())
+
+        self.assertFalse(StockHold.objects.filter(pk=expired.pk).exists())
+        self.assertTrue(StockHold.objects.filter(pk=active.pk).exists())
+
+
+class OrderStatusTests(CheckoutTestCase):
+    def pending_order(self, quantity):
+        order = Order.objects.create(user=self.buyer, total_price="10.00", **ORDER_DETAILS)
+        OrderItem.objects.create(
+            order=order, product=self.products[0], seller=self.seller, quantity=quantity, price="10.00"
+        )
+        return order
+
+    def test_seller_status_change_takes_stock(self):
+        order = self.pending_order(2)
+
+        response = self.client_for(self.seller).put(
+            f"/api/seller/orders/{order.pk}/status/", {"status": "PROCESSING"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertTrue(order.stock_deducted)
+        self.assertEqual(order.status, "PROCESSING")
+        self.assertEqual(self.stock(self.products[0]), 3)
+
+    def test_seller_status_change_refuses_to_oversell(self):
+        order = self.pending_order(6)
+
+        response = self.client_for(self.seller).put(
+            f"/api/seller/orders/{order.pk}/status/", {"status": "SHIPPED"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 409)
+        order.refresh_from_db()
+        self.assertFalse(order.stock_deducted)
+        self.assertEqual(order.status, "PENDING")
+        self.assertEqual(self.stock(self.products[0]), 5)
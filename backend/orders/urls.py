@@ -1,20 +1,24 @@
 from django.urls import path
 from .views import (
+  CheckoutStartView,
   CreateOrderView,
   UserOrdersView,
   SellerOrdersView,
   UpdateOrderStatusView,
   AdminOrdersView,
+  AdminOrdersExportView,
   AdminUpdateOrderStatusView,
   AdminAnalyticsView,
   ) 
 
 urlpatterns = [
+    path("orders/checkout/start/", CheckoutStartView.as_view()),
     path("orders/create/", CreateOrderView.as_view()),
     path("orders/", UserOrdersView.as_view()),
     path("seller/orders/", SellerOrdersView.as_view()),
     path("seller/orders/<int:order_id>/status/", UpdateOrderStatusView.as_view()),
     path("admin/orders/", AdminOrdersView.as_view()),
+    path("admin/orders/export/<str:export_format>/", AdminOrdersExportView.as_view()),
     path("admin/orders/<int:order_id>/status/", AdminUpdateOrderStatusView.as_view()),
     path("admin/analytics/", AdminAnalyticsView.as_view()),
     
@@ -2,62 +2,77 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
-from cart.models import Cart, CartItem
-from .models import Order, OrderItem
-from .serializers import OrderSerializer, SellerOrderSerializer
-from django.db.models import Sum, Count
+from .models import Order, OrderItem, ProductSalesStats
+from .checkout import EmptyCart, OutOfStock, hold_cart, place_order, release_holds, set_order_status
+from .serializers import CheckoutSerializer, OrderSerializer, SellerOrderSerializer
+from django.shortcuts import get_object_or_404
+from django.db.models import Sum, Count, F
 from users.models import User
 from products.models import Product
+from backend.pagination import KeysetPagination
+from backend.exports import EXPORT_FORMATS, stream_export
 
 class CreateOrderView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 16
 
     def post(self, request):
-        cart = Cart.objects.get(user=request.user)
-        cart_items = cart.items.all()
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        if not cart_items.exists():
+        try:
+            order = place_order(request.user, serializer.validated_data)
+        except EmptyCart:
             return Response(
                 {"detail": "Cart is empty"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-
-        total = sum(
-            item.product.final_price() * item.quantity
-            for item in cart_items
-        )
-
-        order = Order.objects.create(
-            user=request.user,
-            full_name=request.data["full_name"],
-            address=request.data["address"],
-            city=request.data["city"],
-            phone=request.data["phone"],
-            payment_method=request.data["payment_method"],
-            total_price=total
-        )
-
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                seller=item.product.seller,
-                quantity=item.quantity,
-                price=item.product.final_price()
+        except OutOfStock as error:
+            return Response(
+                {"detail": "Some items are out of stock", "lines": error.lines},
+                status=status.HTTP_409_CONFLICT
             )
 
-        cart_items.delete()
-
         return Response(
             {"detail": "Order created", "order_id": order.id},
             status=status.HTTP_201_CREATED
         )
 
+class CheckoutStartView(APIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 10
+
+    def post(self, request):
+        try:
+            expires_at = hold_cart(request.user)
+        except EmptyCart:
+            return Response(
+                {"detail": "Cart is empty"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except OutOfStock as error:
+            return Response(
+                {"detail": "Some items are out of stock", "lines": error.lines},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({"detail": "Stock reserved", "expires_at": expires_at})
+
+    def delete(self, request):
+        release_holds(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class UserOrdersView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         orders = Order.objects.filter(user=request.user).order_by("-created_at")
+
+        if KeysetPagination.is_requested(request):
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(orders, request, self)
+            serializer = OrderSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = OrderSerializer(orders, many=True, context={"request": request})
         return Response(serializer.data)
 
@@ -75,6 +90,12 @@ class SellerOrdersView(APIView):
             .order_by("-created_at")
         )
 
+        if KeysetPagination.is_requested(request):
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(orders, request, self)
+            serializer = SellerOrderSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = SellerOrderSerializer(
             orders,
             many=True,
@@ -89,14 +110,19 @@ class UpdateOrderStatusView(APIView):
         if not request.user.is_seller:
             return Response(status=403)
 
-        order = Order.objects.get(id=order_id)
+        order = get_object_or_404(Order, id=order_id)
 
         new_status = request.data.get("status")
         if new_status not in ["PROCESSING", "SHIPPED", "DELIVERED"]:
             return Response(status=400)
 
-        order.status = new_status
-        order.save()
+        try:
+            set_order_status(order, new_status)
+        except OutOfStock as error:
+            return Response(
+                {"detail": "Not enough stock for this order", "lines": error.lines},
+                status=status.HTTP_409_CONFLICT
+            )
 
         return Response({"detail": "Status updated"})
 
@@ -105,34 +131,60 @@ class AdminOrdersView(APIView):
 
     def get(self, request):
         orders = Order.objects.all().order_by("-created_at")
+
+        if KeysetPagination.is_requested(request):
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(orders, request, self)
+            serializer = OrderSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
         serializer = OrderSerializer(orders, many=True)
         return Response(serializer.data)
 
-class AdminUpdateOrderStatusView(APIView):
+class AdminOrdersExportView(APIView):
     permission_classes = [IsAdminUser]
 
-    def put(self, request, order_id):
-        order = Order.objects.get(id=order_id)
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            return Response({"detail": "Unsupported export format"}, status=400)
 
-        new_status = request.data.get("status")
-        if new_status == "processing" and not order.stock_deducted:
-            with transaction.atomic():
-                for item in order.items.all():
-                    product = item.product
+        orders = (
+            Order.objects
+            .annotate(item_count=Count("items"))
+            .order_by("-created_at")
+        )
+        fields = [
+            "id",
+            "user__email",
+            "full_name",
+            "address",
+            "city",
+            "phone",
+            "payment_method",
+            "status",
+            "total_price",
+            "item_count",
+            "created_at",
+        ]
+        return stream_export(orders, fields, export_format, "orders")
 
-                    if product.stock_quantity < item.quantity:
-                        return Response(
-                            {"detail": f"Not enough stock for {product.title}"},
-                            status=400
-                        )
+class AdminUpdateOrderStatusView(APIView):
+    permission_classes = [IsAdminUser]
 
-                    product.stock_quantity -= item.quantity
-                    product.save()
+    def put(self, request, order_id):
+        order = get_object_or_404(Order, id=order_id)
 
-                order.stock_deducted = True
+        new_status = str(request.data.get("status", "")).upper()
+        if new_status not in dict(Order.STATUS_CHOICES):
+            return Response({"detail": "Invalid status"}, status=400)
 
-        order.status = new_status
-        order.save()
+        try:
+            set_order_status(order, new_status)
+        except OutOfStock as error:
+            return Response(
+                {"detail": "Not enough stock for this order", "lines": error.lines},
+                status=status.HTTP_409_CONFLICT
+            )
 
         return Response({"detail": "Order status updated"})
 
@@ -150,10 +202,9 @@ class AdminAnalyticsView(APIView):
         )
 
         best_product = (
-            OrderItem.objects
-            .values("product__title")
-            .annotate(total_sold=Sum("quantity"))
-            .order_by("-total_sold")
+            ProductSalesStats.objects
+            .order_by("-units_sold")
+            .values("product__title", total_sold=F("units_sold"))
             .first()
         )
 
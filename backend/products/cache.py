@@ -0,0 +1,84 @@
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+HOME_CACHE_KEY = "home-payload:{origin}"
+HOME_VERSION_KEY = "home-payload:version"
+CATALOG_VERSION_KEY = "catalog:version"
+FACETS_CACHE_KEY = "facets:{version}:{digest}"
+PRODUCT_FRAGMENT_KEY = "product-fragment:{pk}:{stamp}:{variant}"
+
+
+def _store(key, build, version):
+    payload = build()
+    cache.set(
+        key,
+        {"payload": payload, "version": version, "built_at": time.time()},
+        settings.HOME_CACHE_TIMEOUT,
+    )
+    return payload
+
+
+def _refresh_in_background(key, build, version):
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, True, settings.HOME_CACHE_FRESH_SECONDS):
+        return
+
+    def run():
+        try:
+            _store(key, build, version)
+        finally:
+            cache.delete(lock_key)
+            connections.close_all()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_home_payload(request, build):
+    # The payload holds absolute URLs, so http and https get their own copy.
+    origin = hashlib.md5(request.build_absolute_uri("/").encode()).hexdigest()[:16]
+    key = HOME_CACHE_KEY.format(origin=origin)
+    cached = cache.get_many([key, HOME_VERSION_KEY])
+    entry = cached.get(key)
+    version = cached.get(HOME_VERSION_KEY, 0)
+
+    if entry is None or entry["version"] != version:
+        return _store(key, build, version)
+
+    if time.time() - entry["built_at"] > settings.HOME_CACHE_FRESH_SECONDS:
+        _refresh_in_background(key, build, version)
+    return entry["payload"]
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_home_payload():
+    _bump(HOME_VERSION_KEY)
+
+
+def bump_catalog_version():
+    _bump(CATALOG_VERSION_KEY)
+
+
+def facets_cache_key(params):
+    normalized = "&".join(f"{key}={value}" for key, value in sorted(params.items()))
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    version = cache.get(CATALOG_VERSION_KEY, 0)
+    return FACETS_CACHE_KEY.format(version=version, digest=digest)
+
+
+def product_fragment_key(product, request, fieldset=""):
+    origin = request.build_absolute_uri("/") if request else ""
+    return PRODUCT_FRAGMENT_KEY.format(
+        pk=product.pk,
+        stamp=product.updated_at.timestamp(),
+        variant=hashlib.md5(f"{origin}|{fieldset}".encode()).hexdigest()[:16],
+    )
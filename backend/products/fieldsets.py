@@ -0,0 +1,105 @@
+from django.db.models import Prefetch
+from .models import ProductImage, Tag, RATING_STARS
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+# Model columns each serializer field reads. Fields missing here read the
+# column of the same name; multi-valued relations read none.
+FIELD_COLUMNS = {
+    "final_price": ("price", "discount"),
+    "average_rating": ("rating_average",),
+    "rating_histogram": tuple(f"rating_{star}" for star in RATING_STARS),
+    "tags": (),
+    "images": (),
+}
+
+SINGLE_RELATIONS = ("category", "brand")
+MANY_RELATIONS = ("tags", "images")
+EXPANDABLE = SINGLE_RELATIONS + MANY_RELATIONS
+
+ID_ONLY_PREFETCHES = {
+    "tags": lambda: Tag.objects.only("id"),
+    "images": lambda: ProductImage.objects.only("id", "product"),
+}
+
+EXPANDED_PREFETCHES = {
+    "tags": lambda: Tag.objects.all(),
+    "images": lambda: ProductImage.objects.all(),
+}
+
+
+def _split(value):
+    return frozenset(part.strip() for part in value.split(",") if part.strip())
+
+
+class ProductFieldset:
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        fields = _split(params[FIELDS_PARAM]) if params.get(FIELDS_PARAM) else None
+        expand = _split(params[EXPAND_PARAM]) & frozenset(EXPANDABLE) if EXPAND_PARAM in params else None
+        return cls(fields, expand)
+
+    @property
+    def is_default(self):
+        return self.fields is None and self.expand is None
+
+    @property
+    def signature(self):
+        if self.is_default:
+            return ""
+        fields = ",".join(sorted(self.fields)) if self.fields is not None else "*"
+        expand = ",".join(sorted(self.expand)) if self.expand is not None else "*"
+        return f"{fields}|{expand}"
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return self.expand is None or name in self.expand
+
+    def apply(self, queryset, field_names):
+        if self.is_default:
+            return queryset
+
+        related = [
+            name for name in ("seller",) + SINGLE_RELATIONS
+            if self.includes(name) and (name == "seller" or self.expands(name))
+        ]
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        if self.fields is None:
+            return queryset
+
+        # updated_at keys the fragment cache and created_at is the default
+        # (keyset) ordering, so both are always loaded. So is whatever the
+        # list is ordered by (?ordering=price): keyset cursors read it from
+        # every row, and a deferred column would cost a query per row.
+        # Annotations in the ordering (search_rank) are not columns.
+        columns = {"id", "updated_at", "created_at"}
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        for ordering in queryset.query.order_by:
+            if isinstance(ordering, str) and ordering.lstrip("-") in concrete:
+                columns.add(ordering.lstrip("-"))
+        for name in field_names:
+            if self.includes(name):
+                columns.update(FIELD_COLUMNS.get(name, (name,)))
+        return queryset.only(*columns)
+
+    def prefetches(self):
+        lookups = []
+        for name in MANY_RELATIONS:
+            if not self.includes(name):
+                continue
+            querysets = EXPANDED_PREFETCHES if self.expands(name) else ID_ONLY_PREFETCHES
+            lookups.append(Prefetch(name, queryset=querysets[name]()))
+        return lookups
+
+
+DEFAULT_FIELDSET = ProductFieldset()
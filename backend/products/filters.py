@@ -1,5 +1,7 @@
 import django_filters
+from rest_framework.filters import SearchFilter
 from .models import Product
+from . import search
 
 class ProductFilter(django_filters.FilterSet):
     category = django_filters.NumberFilter(field_name="category__id")
@@ -18,3 +20,12 @@ class ProductFilter(django_filters.FilterSet):
             "min_price",
             "max_price",
         ]
+
+
+class ProductSearchFilter(SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        if not search.is_enabled():
+            return super().filter_queryset(request, queryset, view)
+
+        term = request.query_params.get(self.search_param, "")
+        return search.search_queryset(queryset, term)
@@ -0,0 +1,219 @@
+import csv
+import io
+import json
+import posixpath
+from collections import defaultdict
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import slugify
+from rest_framework import serializers
+from backend.images import queue_variants
+from .models import Product, Category, Brand, Tag, ProductImage
+from .cache import bump_catalog_version
+from . import search
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+class DelimitedListField(serializers.ListField):
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [part.strip() for part in data.split("|") if part.strip()]
+        return super().to_internal_value(data)
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(allow_blank=True, default="")
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    discount = serializers.IntegerField(min_value=0, max_value=100, default=0)
+    stock = serializers.IntegerField(min_value=0)
+    category = serializers.CharField(max_length=100, required=False)
+    brand = serializers.CharField(max_length=100, required=False)
+    tags = DelimitedListField(child=serializers.CharField(max_length=50), required=False)
+    images = DelimitedListField(child=serializers.CharField(max_length=100), required=False)
+
+    def validate_images(self, value):
+        # Only files under the product upload directory; anything else in
+        # media storage (profile pictures, category images) is not the
+        # importer's to attach.
+        prefix = ProductImage._meta.get_field("image").upload_to
+        paths = []
+        for path in value:
+            path = posixpath.normpath(path.lstrip("/"))
+            if not path.startswith(prefix) or not default_storage.exists(path):
+                raise serializers.ValidationError(f'Image "{path}" was not found in product images.')
+            paths.append(path)
+        return paths
+
+
+def read_rows(fileobj, filename):
+    if filename.lower().endswith(".json"):
+        data = json.load(fileobj)
+        return data.get("products", []) if isinstance(data, dict) else data
+
+    content = fileobj.read()
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+    return [
+        {key: value for key, value in row.items() if key and value not in ("", None)}
+        for row in csv.DictReader(io.StringIO(content))
+    ]
+
+
+class NameResolver:
+    def __init__(self, model, create_missing):
+        self.model = model
+        self.create_missing = create_missing
+        self.ids = {}
+        self.missing = set()
+
+    def load(self, names):
+        unknown = [name for name in names if name not in self.ids and name not in self.missing]
+        if not unknown:
+            return
+        for name, pk in self.model.objects.filter(name__in=unknown).order_by("id").values_list("name", "id"):
+            self.ids.setdefault(name, pk)
+        self.missing.update(name for name in unknown if name not in self.ids)
+
+    def is_known(self, name):
+        return name in self.ids or (self.create_missing and name in self.missing)
+
+    # New categories get slugify(name) as their slug, which is unique too:
+    # names that would share a slug, or take an existing one, are errors.
+    def slug_conflicts(self):
+        if self.model is not Category or not self.create_missing:
+            return {}
+        names_by_slug = defaultdict(list)
+        for name in self.missing:
+            names_by_slug[slugify(name)].append(name)
+        taken = set(Category.objects.filter(slug__in=names_by_slug).values_list("slug", flat=True))
+
+        conflicts = {}
+        for slug, names in names_by_slug.items():
+            for name in names:
+                if not slug:
+                    conflicts[name] = f'Category "{name}" cannot be turned into a slug.'
+                elif slug in taken or len(names) > 1:
+                    conflicts[name] = f'Category "{name}" would use the slug "{slug}", which is already taken.'
+        return conflicts
+
+    def create_missing_names(self):
+        if not self.missing:
+            return
+        objects = [self.model(name=name) for name in sorted(self.missing)]
+        if self.model is Category:
+            for obj in objects:
+                obj.slug = slugify(obj.name)
+        for obj in self.model.objects.bulk_create(objects):
+            self.ids[obj.name] = obj.pk
+        self.missing.clear()
+
+
+def _validate(rows, resolvers):
+    valid, errors = [], []
+
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        serializer = ProductImportRowSerializer(data=batch, many=True)
+        if serializer.is_valid():
+            batch_data = serializer.validated_data
+            batch_errors = [{}] * len(batch)
+        else:
+            batch_data = [None] * len(batch)
+            batch_errors = serializer.errors
+            if isinstance(batch_errors, dict):
+                batch_errors = [batch_errors.get(index, {}) for index in range(len(batch))]
+
+        resolvers["category"].load({row["category"] for row in batch_data if row and "category" in row})
+        resolvers["brand"].load({row["brand"] for row in batch_data if row and "brand" in row})
+        resolvers["tags"].load({name for row in batch_data if row for name in row.get("tags", [])})
+
+        for offset, (data, row_errors) in enumerate(zip(batch_data, batch_errors)):
+            row_errors = dict(row_errors)
+            if data is not None:
+                for field in ("category", "brand"):
+                    if field in data and not resolvers[field].is_known(data[field]):
+                        row_errors[field] = [f'Unknown {field} "{data[field]}".']
+                unknown_tags = [name for name in data.get("tags", []) if not resolvers["tags"].is_known(name)]
+                if unknown_tags:
+                    row_errors["tags"] = [f'Unknown tag "{name}".' for name in unknown_tags]
+
+            if row_errors:
+                errors.append({"row": start + offset + 1, "errors": row_errors})
+            elif data is not None:
+                valid.append((start + offset + 1, data))
+
+    # Slugs can only be checked once every batch's new names are known.
+    conflicts = resolvers["category"].slug_conflicts()
+    for row, data in valid:
+        if data.get("category") in conflicts:
+            errors.append({"row": row, "errors": {"category": [conflicts[data["category"]]]}})
+    errors.sort(key=lambda error: error["row"])
+
+    return [data for _, data in valid], errors
+
+
+def _write(rows, seller, resolvers, approve):
+    created = 0
+    image_ids = []
+
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        products = Product.objects.bulk_create([
+            Product(
+                seller=seller,
+                title=row["title"],
+                description=row["description"],
+                price=row["price"],
+                discount=row["discount"],
+                stock=row["stock"],
+                category_id=resolvers["category"].ids.get(row.get("category")),
+                brand_id=resolvers["brand"].ids.get(row.get("brand")),
+                is_approved=approve,
+            )
+            for row in batch
+        ])
+
+        Product.tags.through.objects.bulk_create(
+            [
+                Product.tags.through(product_id=product.pk, tag_id=resolvers["tags"].ids[name])
+                for product, row in zip(products, batch)
+                for name in dict.fromkeys(row.get("tags", []))
+            ],
+            ignore_conflicts=True,
+        )
+        images = ProductImage.objects.bulk_create([
+            ProductImage(product_id=product.pk, image=path)
+            for product, row in zip(products, batch)
+            for path in row.get("images", [])
+        ])
+
+        search.index_products([product.pk for product in products])
+        image_ids.extend(image.pk for image in images)
+        created += len(products)
+
+    return created, image_ids
+
+
+def import_products(rows, seller, create_missing=False, approve=False):
+    resolvers = {
+        "category": NameResolver(Category, create_missing),
+        "brand": NameResolver(Brand, create_missing),
+        "tags": NameResolver(Tag, create_missing),
+    }
+
+    valid, errors = _validate(rows, resolvers)
+    if errors:
+        return 0, errors[:MAX_REPORTED_ERRORS]
+
+    with transaction.atomic():
+        for resolver in resolvers.values():
+            resolver.create_missing_names()
+        created, image_ids = _write(valid, seller, resolvers, approve)
+
+        queue_variants(ProductImage, image_ids, "image", "variants")
+        transaction.on_commit(bump_catalog_version)
+
+    return created, []
@@ -0,0 +1,302 @@
+import json
+import logging
+import math
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Count
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from backend.middleware import QueryRecorder
+from cart.models import CartItem
+from orders.models import OrderItem
+from products.models import Category, Product, Review
+from users.models import User
+
+# (name, role, method, path, payload). Paths and payloads are formatted with
+# the ids picked by Command.fixtures(); writes are rolled back after every
+# request so each iteration sees the same data.
+ENDPOINTS = [
+    ("home", None, "GET", "/api/home/", None),
+    ("product-list", None, "GET", "/api/products/", None),
+    ("product-list-page-5", None, "GET", "/api/products/?page=5", None),
+    ("product-list-search", None, "GET", "/api/products/?search=wireless", None),
+    ("product-list-filtered", None, "GET", "/api/products/?category={category}&ordering=-price", None),
+    ("product-list-fields", None, "GET", "/api/products/?fields=id,title,final_price,images&expand=", None),
+    ("product-facets", None, "GET", "/api/products/facets/", None),
+    ("product-detail", None, "GET", "/api/products/{product}/", None),
+    ("product-related", None, "GET", "/api/products/{product}/related/", None),
+    ("product-reviews", None, "GET", "/api/products/{product}/reviews/", None),
+    ("products-featured", None, "GET", "/api/products/featured/", None),
+    ("products-latest", None, "GET", "/api/products/latest/", None),
+    ("products-best-sellers", None, "GET", "/api/products/best-sellers/", None),
+    ("categories", None, "GET", "/api/categories/", None),
+    ("categories-featured", None, "GET", "/api/categories/featured/", None),
+    ("brands", None, "GET", "/api/brands/", None),
+    ("tags", None, "GET", "/api/tags/", None),
+    ("profile", "user", "GET", "/api/users/profile/", None),
+    ("wishlist", "user", "GET", "/api/wishlist/", None),
+    ("wishlist-add", "user", "POST", "/api/wishlist/", {"product_id": "{other_product}"}),
+    ("wishlist-compact", "user", "GET", "/api/wishlist/?compact=1", None),
+    ("wishlist-contains", "user", "POST", "/api/wishlist/contains/", {"product_ids": ["{product}", "{other_product}"]}),
+    ("wishlist-bulk", "user", "POST", "/api/wishlist/bulk/", {"add": ["{other_product}"], "remove": ["{product}"]}),
+    ("cart", "user", "GET", "/api/cart/", None),
+    ("cart-summary", "user", "GET", "/api/cart/summary/", None),
+    ("cart-count", "user", "GET", "/api/cart/count/", None),
+    ("cart-add", "user", "POST", "/api/cart/", {"product_id": "{other_product}", "quantity": 1}),
+    ("cart-update", "user", "PUT", "/api/cart/item/{cart_item}/update/", {"quantity": 2}),
+    ("cart-sync", "user", "POST", "/api/cart/sync/", {"items": [{"product_id": "{other_product}", "quantity": 1}]}),
+    ("cart-batch", "user", "POST", "/api/cart/batch/", {
+        "add": [{"product_id": "{other_product}", "quantity": 2}],
+        "update": [{"product_id": "{product}", "quantity": 1}],
+    }),
+    ("review-add", "user", "POST", "/api/products/{other_product}/reviews/", {"rating": 4, "comment": "Good value"}),
+    ("orders", "user", "GET", "/api/orders/", None),
+    ("checkout-start", "user", "POST", "/api/orders/checkout/start/", None),
+    ("order-create", "user", "POST", "/api/orders/create/", {
+        "full_name": "Benchmark User",
+        "address": "1 Test Street",
+        "city": "Cairo",
+        "phone": "01000000000",
+        "payment_method": "cash",
+    }),
+    ("seller-products", "seller", "GET", "/api/seller/products/", None),
+    ("seller-orders", "seller", "GET", "/api/seller/orders/", None),
+    ("seller-order-status", "seller", "PUT", "/api/seller/orders/{seller_order}/status/", {"status": "SHIPPED"}),
+    ("admin-products", "staff", "GET", "/api/admin/products/", None),
+    ("admin-orders", "staff", "GET", "/api/admin/orders/", None),
+    ("admin-users", "staff", "GET", "/api/users/admin/users/", None),
+    ("admin-analytics", "staff", "GET", "/api/admin/analytics/", None),
+    ("admin-categories", "staff", "GET", "/api/admin/categories/", None),
+    ("admin-tags", "staff", "GET", "/api/admin/tags/", None),
+]
+
+COLUMNS = ("p50_ms", "p95_ms", "p99_ms", "queries", "peak_kb")
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def _format(value, fixtures):
+    if isinstance(value, str):
+        return value.format(**fixtures)
+    if isinstance(value, dict):
+        return {key: _format(item, fixtures) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_format(item, fixtures) for item in value]
+    return value
+
+
+class Command(BaseCommand):
+    help = "Measure latency, queries and memory of the API endpoints through the test client."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--endpoints",
+            help="Comma separated endpoint names or name prefixes to run.",
+        )
+        parser.add_argument("--user", help="E-mail of the customer to run as.")
+        parser.add_argument("--seller", help="E-mail of the seller to run as.")
+        parser.add_argument("--staff", help="E-mail of the staff user to run as.")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", help="Compare against a JSON file written by --output.")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+
+        endpoints = ENDPOINTS
+        if options["endpoints"]:
+            wanted = [name.strip() for name in options["endpoints"].split(",") if name.strip()]
+            endpoints = [
+                endpoint for endpoint in ENDPOINTS
+                if any(endpoint[0].startswith(name) for name in wanted)
+            ]
+            if not endpoints:
+                raise CommandError("No endpoint matches --endpoints.")
+
+        users = self.users(options)
+        fixtures = self.fixtures(users)
+        if fixtures is None:
+            raise CommandError("The catalog is empty; run seed_catalog first.")
+
+        clients = {None: Client(raise_request_exception=False)}
+        for role, user in users.items():
+            token = RefreshToken.for_user(user).access_token if user else None
+            clients[role] = (
+                Client(raise_request_exception=False, HTTP_AUTHORIZATION=f"Bearer {token}")
+                if token else None
+            )
+
+        # The per-request log lines would drown the table; the numbers they
+        # carry are collected here anyway.
+        logging.getLogger("backend.requests").setLevel(logging.ERROR)
+
+        results = {}
+        self.stdout.write(
+            f"{'endpoint':<26}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'queries':>9}{'peak KB':>9}"
+        )
+        for name, role, method, path, payload in endpoints:
+            client = clients.get(role)
+            if client is None:
+                self.stdout.write(f"{name:<26}{'skipped, no ' + role + ' account':>30}")
+                continue
+
+            request = (client, method, _format(path, fixtures), _format(payload, fixtures))
+            result = self.measure(request, options["iterations"], options["warmup"])
+            results[name] = result
+            self.stdout.write(
+                f"{name:<26}{result['status']:>7}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['queries']:>9}{result['peak_kb']:>9.0f}"
+            )
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "iterations": options["iterations"],
+            "products": Product.objects.count(),
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options["compare"]:
+            with open(options["compare"]) as baseline:
+                self.compare(json.load(baseline), report)
+
+    def users(self, options):
+        def pick(email, queryset):
+            if email:
+                user = User.objects.filter(email=email).first()
+                if user is None:
+                    raise CommandError(f"No user with e-mail {email}.")
+                return user
+            return queryset.first()
+
+        active = User.objects.filter(is_active=True)
+        return {
+            "user": pick(
+                options["user"],
+                active.filter(is_seller=False, is_staff=False)
+                .annotate(order_count=Count("orders", distinct=True))
+                .order_by("-order_count", "id"),
+            ),
+            "seller": pick(
+                options["seller"],
+                active.filter(is_seller=True)
+                .annotate(product_count=Count("products", distinct=True))
+                .order_by("-product_count", "id"),
+            ),
+            "staff": pick(options["staff"], active.filter(is_staff=True).order_by("id")),
+        }
+
+    def fixtures(self, users):
+        approved = Product.objects.filter(is_approved=True)
+        product = approved.order_by("-rating_count", "id").first()
+        if product is None:
+            return None
+
+        customer = users["user"]
+        reviewed = Review.objects.filter(user=customer).values("product") if customer else []
+        in_cart = CartItem.objects.filter(cart__user=customer).values("product") if customer else []
+        other_product = (
+            approved.exclude(id=product.id).exclude(id__in=reviewed).exclude(id__in=in_cart)
+            .filter(stock__gt=0).order_by("-created_at").first()
+        ) or product
+
+        cart_item = CartItem.objects.filter(cart__user=customer).order_by("id").first() if customer else None
+        seller_item = (
+            OrderItem.objects.filter(seller=users["seller"]).order_by("-order__created_at").first()
+            if users["seller"] else None
+        )
+        category = Category.objects.filter(product__is_approved=True).order_by("id").first()
+
+        return {
+            "product": product.id,
+            "other_product": other_product.id,
+            "category": category.id if category else "",
+            "cart_item": cart_item.id if cart_item else 0,
+            "seller_order": seller_item.order_id if seller_item else 0,
+        }
+
+    def request(self, client, method, path, payload):
+        # Writes run in a transaction that is always rolled back, so on_commit
+        # work (search indexing, image variants) is skipped too.
+        with transaction.atomic():
+            response = client.generic(
+                method,
+                path,
+                json.dumps(payload) if payload is not None else "",
+                content_type="application/json",
+            )
+            if method != "GET":
+                transaction.set_rollback(True)
+        return response
+
+    def measure(self, request, iterations, warmup):
+        for _ in range(warmup):
+            self.request(*request)
+
+        timings, queries = [], []
+        for _ in range(iterations):
+            recorder = QueryRecorder()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                started = time.perf_counter()
+                response = self.request(*request)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(recorder.count)
+
+        # tracemalloc slows every allocation down, so memory is sampled in a
+        # separate pass that does not count towards the timings.
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            self.request(*request)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "method": request[1],
+            "path": request[2],
+            "status": response.status_code,
+            "bytes": len(getattr(response, "content", b"")),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "queries": max(queries),
+            "peak_kb": round(peak / 1024, 1),
+        }
+
+    def compare(self, baseline, report):
+        self.stdout.write(f"\nCompared with the run from {baseline.get('created_at', 'unknown')}:")
+        self.stdout.write(f"{'endpoint':<26}" + "".join(f"{column:>18}" for column in COLUMNS))
+        for name, result in report["results"].items():
+            before = baseline.get("results", {}).get(name)
+            if before is None:
+                self.stdout.write(f"{name:<26}{'not in baseline':>18}")
+                continue
+
+            cells = []
+            for column in COLUMNS:
+                old, new = before[column], result[column]
+                change = f" ({(new - old) / old * 100:+.0f}%)" if old else ""
+                cells.append(f"{new - old:+.1f}{change}".rjust(18))
+            line = f"{name:<26}" + "".join(cells)
+            if before["status"] != result["status"]:
+                line += f"  status {before['status']} -> {result['status']}"
+            self.stdout.write(line)
@@ -0,0 +1,118 @@
+import random
+import sqlite3
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from products.search import BM25_WEIGHTS, build_match_query
+
+WORDS = [
+    "apple", "iphone", "samsung", "galaxy", "pro", "max", "ultra", "mini",
+    "wireless", "charger", "case", "leather", "laptop", "gaming", "monitor",
+    "keyboard", "mouse", "headphones", "bluetooth", "speaker", "camera",
+    "lens", "watch", "smart", "fitness", "tracker", "tablet", "stylus",
+    "cable", "usb", "portable", "battery", "screen", "protector", "glass",
+    "stand", "holder", "kitchen", "blender", "coffee", "machine", "shoes",
+    "running", "jacket", "cotton", "shirt", "backpack", "travel", "bottle",
+]
+BRANDS = [
+    "Apple", "Samsung", "Sony", "Xiaomi", "Lenovo", "Dell", "HP", "Anker",
+    "Logitech", "Nike", "Adidas", "Philips", "Bosch", "Huawei", "Oppo",
+]
+SYLLABLES = ["ka", "lo", "mi", "ren", "to", "sa", "vex", "dor", "qui", "na", "pel", "zor"]
+
+
+class Command(BaseCommand):
+    help = "Compare LIKE scans against the FTS5 product index on synthetic data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        count = options["products"]
+        repeat = options["repeat"]
+
+        # A long tail of model/series names on top of the common words keeps
+        # the term distribution closer to a real catalog.
+        vocabulary = WORDS + [
+            "".join(rng.choices(SYLLABLES, k=3)) for _ in range(5000)
+        ]
+        weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+        db = sqlite3.connect(":memory:")
+        db.execute("CREATE TABLE brand (id INTEGER PRIMARY KEY, name TEXT)")
+        db.execute(
+            "CREATE TABLE product (id INTEGER PRIMARY KEY, title TEXT, "
+            "description TEXT, brand_id INTEGER)"
+        )
+        db.executemany("INSERT INTO brand VALUES (?, ?)", list(enumerate(BRANDS, 1)))
+
+        rows = (
+            (
+                i,
+                " ".join(rng.choices(vocabulary, weights, k=rng.randint(3, 7))).title(),
+                " ".join(rng.choices(vocabulary, weights, k=rng.randint(30, 80))),
+                rng.randint(1, len(BRANDS)),
+            )
+            for i in range(1, count + 1)
+        )
+        db.executemany("INSERT INTO product VALUES (?, ?, ?, ?)", rows)
+
+        started = time.perf_counter()
+        db.execute(
+            "CREATE VIRTUAL TABLE product_fts USING fts5(title, description, brand, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        db.execute(
+            "INSERT INTO product_fts (rowid, title, description, brand) "
+            "SELECT p.id, p.title, p.description, b.name "
+            "FROM product p LEFT JOIN brand b ON b.id = p.brand_id"
+        )
+        build_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"{count} products, FTS index built in {build_ms:.0f} ms\n")
+
+        # Both paths run what a paginated list request runs: a COUNT over the
+        # matches plus the first page.
+        like_from = "FROM product p LEFT JOIN brand b ON b.id = p.brand_id WHERE {}"
+        bm25 = ", ".join(str(w) for w in BM25_WEIGHTS)
+        fts_count = "SELECT COUNT(*) FROM product_fts WHERE product_fts MATCH ?"
+        fts_page = (
+            f"SELECT rowid FROM product_fts WHERE product_fts MATCH ? "
+            f"ORDER BY bm25(product_fts, {bm25}) LIMIT 9"
+        )
+
+        queries = [
+            "iphone", "iph", "wireless charger", "gaming laptop",
+            vocabulary[60], vocabulary[400][:4], vocabulary[3000],
+        ]
+        self.stdout.write(
+            f"{'query':<20}{'matches':>9}{'LIKE p50 ms':>14}{'FTS p50 ms':>14}{'speedup':>10}"
+        )
+        for query in queries:
+            terms = query.split()
+            clause = " AND ".join(
+                "(p.title LIKE ? OR p.description LIKE ? OR b.name LIKE ?)" for _ in terms
+            )
+            like_params = [f"%{t}%" for t in terms for _ in range(3)]
+            like_ms = self.measure(db, [
+                (f"SELECT COUNT(*) {like_from.format(clause)}", like_params),
+                (f"SELECT p.id {like_from.format(clause)} ORDER BY p.id DESC LIMIT 9", like_params),
+            ], repeat)
+
+            match = [build_match_query(query)]
+            matches = db.execute(fts_count, match).fetchone()[0]
+            fts_ms = self.measure(db, [(fts_count, match), (fts_page, match)], repeat)
+            self.stdout.write(
+                f"{query:<20}{matches:>9}{like_ms:>14.2f}{fts_ms:>14.2f}{like_ms / fts_ms:>9.1f}x"
+            )
+
+    def measure(self, db, statements, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for sql, params in statements:
+                db.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
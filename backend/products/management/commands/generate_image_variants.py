@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from backend.images import refresh_variants
+from products.models import Category, ProductImage
+from users.models import User
+
+TARGETS = (
+    (ProductImage, "image", "variants"),
+    (Category, "image", "image_variants"),
+    (User, "profile_image", "profile_image_variants"),
+)
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG variants for existing product, category and profile images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate variants even for images that already have them.",
+        )
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model, image_field, variants_field in TARGETS:
+            rows = (
+                model.objects
+                .exclude(**{image_field: ""})
+                .exclude(**{f"{image_field}__isnull": True})
+                .values_list("pk", image_field, variants_field)
+            )
+            for pk, name, variants in rows:
+                if options["force"] or (variants or {}).get("source") != name:
+                    jobs.append((model, pk, image_field, variants_field))
+
+        def run(job):
+            try:
+                refresh_variants(*job)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            list(executor.map(run, jobs))
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(jobs)} images."))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.importer import import_products, read_rows
+from products.similarity import rebuild_related_products
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Bulk import products from a CSV or JSON file for a seller."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file to import.")
+        parser.add_argument("--seller", required=True, help="Email of the seller that owns the products.")
+        parser.add_argument(
+            "--create-missing",
+            action="store_true",
+            help="Create categories, brands and tags that do not exist yet.",
+        )
+        parser.add_argument(
+            "--approve",
+            action="store_true",
+            help="Mark imported products as approved.",
+        )
+
+    def handle(self, *args, **options):
+        seller = User.objects.filter(email=options["seller"]).first()
+        if seller is None:
+            raise CommandError(f"No user with email {options['seller']}.")
+
+        try:
+            with open(options["path"], "rb") as fileobj:
+                rows = read_rows(fileobj, options["path"])
+        except (OSError, ValueError, UnicodeDecodeError) as exc:
+            raise CommandError(f"Could not read {options['path']}: {exc}")
+
+        created, errors = import_products(
+            rows,
+            seller,
+            create_missing=options["create_missing"],
+            approve=options["approve"],
+        )
+        if errors:
+            for error in errors:
+                self.stderr.write(f"Row {error['row']}: {error['errors']}")
+            raise CommandError("Import aborted, no products were created.")
+
+        if options["approve"]:
+            rebuild_related_products()
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} products."))
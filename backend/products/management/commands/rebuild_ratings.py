@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized rating count, sum, average and histogram of every product."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--product",
+            type=int,
+            action="append",
+            dest="product_ids",
+            help="Only repair the given product id (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options["product_ids"]:
+            products = products.filter(id__in=options["product_ids"])
+
+        updated = products.refresh_ratings()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed ratings for {updated} products."))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.similarity import rebuild_related_products
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed related-product neighbours for every approved product."
+
+    def handle(self, *args, **options):
+        count = rebuild_related_products()
+        self.stdout.write(self.style.SUCCESS(f"Stored neighbours for {count} products."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+from products import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 product search index from the product table."
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            raise CommandError("The full-text index is only available on SQLite.")
+
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products."))
@@ -0,0 +1,279 @@
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from cart.models import Cart, CartItem
+from cart.utils import refresh_cart_counts
+from orders.models import Order, OrderItem
+from orders.stats import rebuild_sales_stats
+from products import search
+from products.cache import bump_catalog_version
+from products.models import Brand, Category, Product, ProductImage, Review, Tag, Wishlist
+from products.similarity import rebuild_related_products
+from users.models import User
+from .benchmark_search import BRANDS, WORDS
+
+CATEGORIES = [
+    "Phones", "Laptops", "Tablets", "Audio", "Cameras", "Wearables", "Gaming",
+    "Computer Accessories", "Mobile Accessories", "Home Appliances", "Kitchen",
+    "Furniture", "Men Clothing", "Women Clothing", "Shoes", "Bags", "Sports",
+    "Beauty", "Books", "Toys",
+]
+TAGS = [
+    "new", "sale", "bestseller", "limited", "eco", "premium", "budget", "gift",
+    "wireless", "waterproof", "refurbished", "bundle", "exclusive", "trending",
+]
+CITIES = ["Cairo", "Alexandria", "Giza", "Mansoura", "Tanta", "Aswan", "Luxor", "Suez"]
+ORDER_STATUSES = [("PENDING", 15), ("PROCESSING", 15), ("SHIPPED", 20), ("DELIVERED", 50)]
+RATING_WEIGHTS = [4, 5, 11, 30, 50]
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Seed the database with a synthetic catalog, customers, carts and orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--sellers", type=int, default=50)
+        parser.add_argument("--products", type=int, default=20000)
+        parser.add_argument("--reviews", type=int, default=50000)
+        parser.add_argument("--wishlists", type=int, default=10000)
+        parser.add_argument("--carts", type=int, default=800)
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix for generated e-mail addresses, so repeated runs do not collide.",
+        )
+        parser.add_argument(
+            "--skip-related",
+            action="store_true",
+            help="Do not rebuild the related-products table afterwards.",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["sellers"] < 1:
+            raise CommandError("--users and --sellers must be at least 1.")
+
+        self.rng = random.Random(options["seed"])
+        self.prefix = options["prefix"]
+        self.now = timezone.now()
+
+        with transaction.atomic():
+            categories, brands, tags = self.seed_taxonomy()
+            customers = self.seed_users(options["users"], is_seller=False)
+            sellers = self.seed_users(options["sellers"], is_seller=True)
+            products = self.seed_products(options["products"], sellers, categories, brands, tags)
+            self.seed_reviews(options["reviews"], products, customers)
+            self.seed_wishlists(options["wishlists"], products, customers)
+            self.seed_carts(options["carts"], products, customers)
+            self.seed_orders(options["orders"], products, customers)
+
+            self.log("Rebuilding derived tables")
+            Product.objects.filter(seller__in=sellers).refresh_ratings()
+            search.rebuild_index()
+            rebuild_sales_stats()
+            if not options["skip_related"]:
+                rebuild_related_products()
+            transaction.on_commit(bump_catalog_version)
+
+        self.stdout.write(self.style.SUCCESS("Seeding finished."))
+
+    def log(self, message):
+        self.stdout.write(f"  {message}")
+
+    def past(self, max_days=365):
+        # Activity grows over time, so recent dates are more likely.
+        return self.now - timedelta(days=max_days * self.rng.random() ** 2, seconds=self.rng.randint(0, 86400))
+
+    def zipf_choices(self, population, k, exponent=1.1):
+        weights = [1 / (rank ** exponent) for rank in range(1, len(population) + 1)]
+        return self.rng.choices(population, weights, k=k)
+
+    def backdate(self, model, objects, field="created_at"):
+        for obj in objects:
+            setattr(obj, field, self.past())
+        model.objects.bulk_update(objects, [field], batch_size=500)
+
+    def seed_taxonomy(self):
+        for name in CATEGORIES:
+            Category.objects.get_or_create(name=name, defaults={"slug": slugify(name)})
+        existing_brands = set(Brand.objects.values_list("name", flat=True))
+        Brand.objects.bulk_create([Brand(name=name) for name in BRANDS if name not in existing_brands])
+        existing_tags = set(Tag.objects.values_list("name", flat=True))
+        Tag.objects.bulk_create([Tag(name=name) for name in TAGS if name not in existing_tags])
+
+        return (
+            list(Category.objects.filter(name__in=CATEGORIES)),
+            list(Brand.objects.filter(name__in=BRANDS)),
+            list(Tag.objects.filter(name__in=TAGS)),
+        )
+
+    def seed_users(self, count, is_seller):
+        kind = "seller" if is_seller else "user"
+        self.log(f"Creating {count} {kind}s")
+        password = make_password("password")
+        start = User.objects.filter(email__startswith=f"{self.prefix}-{kind}-").count()
+
+        users = [
+            User(
+                email=f"{self.prefix}-{kind}-{start + i}@example.com",
+                username=f"{self.prefix}-{kind}-{start + i}",
+                password=password,
+                phone=f"01{self.rng.randint(100000000, 299999999)}",
+                city=self.rng.choice(CITIES),
+                country="Egypt",
+                is_active=True,
+                is_seller=is_seller,
+            )
+            for i in range(count)
+        ]
+        return User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+    def seed_products(self, count, sellers, categories, brands, tags):
+        self.log(f"Creating {count} products")
+        image_names = self.available_images()
+
+        products = []
+        for seller in self.zipf_choices(sellers, count, exponent=0.9):
+            category = self.rng.choice(categories)
+            # Prices are roughly log-normal: many cheap items, a long tail of
+            # expensive ones.
+            price = Decimal(f"{max(math.exp(self.rng.gauss(4.2, 1.1)), 2):.0f}") - Decimal("0.01")
+            products.append(Product(
+                seller=seller,
+                title=" ".join(self.zipf_choices(WORDS, self.rng.randint(2, 5))).title(),
+                description=" ".join(self.zipf_choices(WORDS, self.rng.randint(20, 80))),
+                price=price,
+                discount=self.rng.choice([0] * 7 + [5, 10, 15, 20, 25, 30, 50]),
+                stock=0 if self.rng.random() < 0.05 else int(self.rng.expovariate(1 / 40)) + 1,
+                category=category,
+                brand=self.rng.choice(brands) if self.rng.random() < 0.8 else None,
+                is_approved=self.rng.random() < 0.95,
+                is_featured=self.rng.random() < 0.02,
+            ))
+        products = Product.objects.bulk_create(products, batch_size=BATCH_SIZE)
+        self.backdate(Product, products)
+
+        Product.tags.through.objects.bulk_create(
+            [
+                Product.tags.through(product_id=product.id, tag_id=tag.id)
+                for product in products
+                for tag in self.rng.sample(tags, self.rng.choice([0, 0, 1, 1, 2, 3]))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        if image_names:
+            ProductImage.objects.bulk_create(
+                [
+                    ProductImage(product=product, image=self.rng.choice(image_names))
+                    for product in products
+                    for _ in range(self.rng.choice([1, 1, 2, 3, 4]))
+                ],
+                batch_size=BATCH_SIZE,
+            )
+        return products
+
+    def available_images(self):
+        try:
+            _, files = default_storage.listdir("products")
+        except FileNotFoundError:
+            return []
+        return [f"products/{name}" for name in files]
+
+    def seed_reviews(self, count, products, customers):
+        self.log(f"Creating up to {count} reviews")
+        approved = [product for product in products if product.is_approved]
+        pairs = set()
+        for product in self.zipf_choices(approved, count):
+            pairs.add((product.id, self.rng.choice(customers).id))
+
+        reviews = Review.objects.bulk_create(
+            [
+                Review(
+                    product_id=product_id,
+                    user_id=user_id,
+                    rating=self.rng.choices([1, 2, 3, 4, 5], RATING_WEIGHTS)[0],
+                    comment=" ".join(self.rng.choices(WORDS, k=self.rng.randint(0, 25))),
+                )
+                for product_id, user_id in pairs
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        self.backdate(Review, reviews)
+
+    def seed_wishlists(self, count, products, customers):
+        self.log(f"Creating up to {count} wishlist entries")
+        approved = [product for product in products if product.is_approved]
+        pairs = {
+            (self.rng.choice(customers).id, product.id)
+            for product in self.zipf_choices(approved, count)
+        }
+        Wishlist.objects.bulk_create(
+            [Wishlist(user_id=user_id, product_id=product_id) for user_id, product_id in pairs],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    def seed_carts(self, count, products, customers):
+        self.log(f"Creating {count} carts")
+        approved = [product for product in products if product.is_approved]
+        carts = Cart.objects.bulk_create(
+            [Cart(user=user) for user in self.rng.sample(customers, min(count, len(customers)))],
+            ignore_conflicts=True,
+        )
+        carts = Cart.objects.filter(user__in=[cart.user for cart in carts])
+
+        items = []
+        for cart in carts:
+            for product in set(self.zipf_choices(approved, self.rng.randint(1, 8))):
+                items.append(CartItem(cart=cart, product=product, quantity=self.rng.choice([1, 1, 1, 2, 3])))
+        CartItem.objects.bulk_create(items, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        refresh_cart_counts(carts)
+
+    def seed_orders(self, count, products, customers):
+        self.log(f"Creating {count} orders")
+        approved = [product for product in products if product.is_approved]
+        statuses, status_weights = zip(*ORDER_STATUSES)
+
+        orders, lines = [], []
+        for customer in self.zipf_choices(customers, count, exponent=0.7):
+            picked = set(self.zipf_choices(approved, self.rng.choice([1, 1, 1, 2, 2, 3, 4])))
+            order_lines = [(product, self.rng.choice([1, 1, 1, 2])) for product in picked]
+            status = self.rng.choices(statuses, status_weights)[0]
+            orders.append(Order(
+                user=customer,
+                full_name=customer.username,
+                address=f"{self.rng.randint(1, 200)} Street {self.rng.randint(1, 90)}",
+                city=customer.city,
+                phone=customer.phone,
+                payment_method=self.rng.choice(["cash", "card"]),
+                status=status,
+                total_price=sum(product.final_price() * quantity for product, quantity in order_lines),
+                stock_deducted=status != "PENDING",
+            ))
+            lines.append(order_lines)
+
+        orders = Order.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+        self.backdate(Order, orders)
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    product=product,
+                    seller_id=product.seller_id,
+                    quantity=quantity,
+                    price=product.final_price(),
+                )
+                for order, order_lines in zip(orders, lines)
+                for product, quantity in order_lines
+            ],
+            batch_size=BATCH_SIZE,
+        )
@@ -0,0 +1,78 @@
+# Generated by Django 6.0 on 2026-10-18 11:12
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_ratings(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    Review = apps.get_model("products", "Review")
+    reviews = Review.objects.filter(product=OuterRef("pk")).values("product")
+
+    def review_aggregate(aggregate, default):
+        return Coalesce(
+            Subquery(reviews.annotate(value=aggregate).values("value")),
+            default,
+        )
+
+    Product.objects.update(
+        rating_count=review_aggregate(Count("id"), 0),
+        rating_sum=review_aggregate(Sum("rating"), 0),
+        rating_average=review_aggregate(Avg("rating"), 0.0),
+        **{
+            f"rating_{star}": review_aggregate(Count("id", filter=Q(rating=star)), 0)
+            for star in range(1, 6)
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_average',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
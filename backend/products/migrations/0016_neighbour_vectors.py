@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_stock_holds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productneighbours',
+            name='cutoff',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='productneighbours',
+            name='vector',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
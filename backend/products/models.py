@@ -1,11 +1,17 @@
+from decimal import ROUND_HALF_UP, Decimal
 from django.db import models
+from django.db.models import Avg, Count, F, FloatField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce
 from users.models import User
+from django.utils import timezone
 from django.utils.text import slugify
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True, blank=True)
     image = models.ImageField(upload_to="categories/", null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -18,6 +24,7 @@ class Category(models.Model):
 
 class Brand(models.Model):
     name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -25,11 +32,44 @@ class Brand(models.Model):
 
 class Tag(models.Model):
     name = models.CharField(max_length=50)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 
+RATING_STARS = (1, 2, 3, 4, 5)
+
+
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        return self.select_related("seller", "category", "brand")
+
+    def touch(self):
+        return self.update(updated_at=timezone.now())
+
+    def with_available_stock(self, exclude_user=None):
+        return self.annotate(available_stock=F("stock") - held_stock("pk", exclude_user))
+
+    def refresh_ratings(self):
+        reviews = Review.objects.filter(product=OuterRef("pk")).values("product")
+
+        def review_aggregate(aggregate, default):
+            return Coalesce(
+                Subquery(reviews.annotate(value=aggregate).values("value")),
+                default,
+            )
+
+        return self.update(
+            updated_at=timezone.now(),
+            rating_count=review_aggregate(Count("id"), 0),
+            rating_sum=review_aggregate(Sum("rating"), 0),
+            rating_average=review_aggregate(Avg("rating"), 0.0),
+            **{
+                f"rating_{star}": review_aggregate(Count("id", filter=Q(rating=star)), 0)
+                for star in RATING_STARS
+            },
+        )
 
 
 class Product(models.Model):
@@ -58,14 +98,59 @@ class Product(models.Model):
     tags = models.ManyToManyField(Tag, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     is_approved = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False)
 
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_average = models.FloatField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        # Boolean filters compile to bare column tests ("WHERE is_approved"),
+        # which SQLite can only serve through a partial index with the same
+        # condition, not through a composite index on the flag.
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=Q(is_approved=True),
+                name="product_approved_created_idx",
+            ),
+            models.Index(
+                fields=["created_at"],
+                condition=Q(is_featured=True, is_approved=True),
+                name="product_featured_idx",
+            ),
+            models.Index(fields=["seller", "created_at"], name="product_seller_created_idx"),
+        ]
+
+    # Rounded half up to whole cents; cart.utils.unit_price() is the same
+    # calculation in SQL, so product pages, carts and orders agree.
     def final_price(self):
         if self.discount:
-            return self.price - (self.price * self.discount / 100)
+            price = Decimal(self.price) * (100 - self.discount) / 100
+            return price.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
         return self.price
 
+    def record_rating(self, rating):
+        Product.objects.filter(pk=self.pk).update(
+            updated_at=timezone.now(),
+            rating_count=F("rating_count") + 1,
+            rating_sum=F("rating_sum") + rating,
+            rating_average=Cast(F("rating_sum") + rating, FloatField()) / (F("rating_count") + 1),
+            **{f"rating_{rating}": F(f"rating_{rating}") + 1},
+        )
+
+    def rating_histogram(self):
+        return {str(star): getattr(self, f"rating_{star}") for star in RATING_STARS}
+
     def __str__(self):
         return self.title
 
@@ -85,6 +170,10 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ("product", "user")
+        indexes = [
+            models.Index(fields=["product", "created_at"], name="review_product_created_idx"),
+            models.Index(fields=["product", "rating"], name="review_product_rating_idx"),
+        ]
 
     def __str__(self):
         return f"{self.product.title} - {self.rating}"
@@ -96,6 +185,7 @@ class ProductImage(models.Model):
         related_name="images"
     )
     image = models.ImageField(upload_to="products/")
+    variants = models.JSONField(default=dict, blank=True)
 
 class Wishlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="wishlists")
@@ -104,6 +194,60 @@ class Wishlist(models.Model):
 
     class Meta:
         unique_together = ("user", "product")
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="wishlist_user_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.product.title}"
+
+
+class ProductNeighbours(models.Model):
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="neighbours"
+    )
+    neighbours = models.JSONField(default=list)  # [[product_id, score], ...]
+    vector = models.BinaryField(default=b"")
+    cutoff = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class StockHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+# Units of a product set aside for a user's checkout until expires_at.
+class StockHold(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="stock_holds")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_holds")
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = StockHoldQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ("user", "product")
+        indexes = [
+            models.Index(fields=["product", "expires_at"], name="stockhold_product_expires_idx"),
+            models.Index(fields=["expires_at"], name="stockhold_expires_idx"),
+        ]
+
+
+# Units of the product referenced by product_ref held by active checkouts,
+# other than exclude_user's own. Served by stockhold_product_expires_idx.
+def held_stock(product_ref, exclude_user=None):
+    holds = StockHold.objects.active().filter(product=OuterRef(product_ref))
+    if exclude_user is not None:
+        holds = holds.exclude(user=exclude_user)
+    return Coalesce(
+        Subquery(holds.values("product").annotate(total=Sum("quantity")).values("total")),
+        0,
+    )
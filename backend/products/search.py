@@ -0,0 +1,108 @@
+import re
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "products_product_fts"
+
+# bm25() column weights, in the column order of the FTS table:
+# title, description, brand.
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+INDEX_SELECT_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, title, description, brand)
+    SELECT p.id, p.title, p.description, COALESCE(b.name, '')
+    FROM products_product p
+    LEFT JOIN products_brand b ON b.id = p.brand_id
+"""
+
+BATCH_SIZE = 500
+
+
+def is_enabled():
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(term):
+    tokens = TOKEN_RE.findall(term or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_queryset(queryset, term):
+    match = build_match_query(term)
+    if match is None:
+        return queryset
+
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    table = queryset.model._meta.db_table
+    rank = RawSQL(
+        f"SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+        (match,),
+    )
+    matches = RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+        (match,),
+    )
+    return (
+        queryset
+        .filter(id__in=matches)
+        .annotate(search_rank=rank)
+        .order_by("search_rank", *queryset.query.order_by)
+    )
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def index_products(product_ids):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        for batch in _batches(product_ids):
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", batch
+            )
+            cursor.execute(
+                f"{INDEX_SELECT_SQL} WHERE p.id IN ({placeholders})", batch
+            )
+
+
+def remove_products(product_ids):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        for batch in _batches(product_ids):
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", batch
+            )
+
+
+def update_brand(brand_id, name):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {FTS_TABLE} SET brand = %s WHERE rowid IN "
+            f"(SELECT id FROM products_product WHERE brand_id = %s)",
+            [name, brand_id],
+        )
+
+
+def rebuild_index():
+    if not is_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(INDEX_SELECT_SQL)
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
@@ -1,4 +1,10 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
+from backend.images import variant_urls, variant_srcset
+from .cache import product_fragment_key
+from .fieldsets import DEFAULT_FIELDSET, EXPANDABLE, MANY_RELATIONS
 from .models import (
     Product,
     Category,
@@ -16,12 +22,14 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = "__all__"
+        read_only_fields = ["image_variants"]
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
         request = self.context.get("request")
         if instance.image and request:
             data["image"] = request.build_absolute_uri(instance.image.url)
+        data["image_variants"] = variant_urls(instance.image_variants, request)
         return data
 
 class BrandSerializer(serializers.ModelSerializer):
@@ -38,10 +46,18 @@ class TagSerializer(serializers.ModelSerializer):
 
 class ProductImageSerializer(serializers.ModelSerializer):
     image = serializers.ImageField()
+    variants = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "variants", "srcset"]
+
+    def get_variants(self, obj):
+        return variant_urls(obj.variants, self.context.get("request"))
+
+    def get_srcset(self, obj):
+        return variant_srcset(obj.variants, self.context.get("request"))
 
 class ReviewSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
@@ -51,6 +67,12 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "rating", "comment", "created_at"]
 
 
+class ProductListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        products = data.all() if hasattr(data, "all") else data
+        return self.child.represent(list(products))
+
+
 class ProductSerializer(serializers.ModelSerializer):
     seller = serializers.StringRelatedField(read_only=True)
     category = CategorySerializer(read_only=True)
@@ -60,8 +82,8 @@ class ProductSerializer(serializers.ModelSerializer):
 
     final_price = serializers.SerializerMethodField()
 
-    reviews = ReviewSerializer(many=True, read_only=True)
     average_rating = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -79,20 +101,78 @@ class ProductSerializer(serializers.ModelSerializer):
             "tags",
             "images",
             "created_at",
-            "reviews",
             "average_rating",
+            "rating_count",
+            "rating_histogram",
             "is_approved",
             "is_featured",
         ]
+        read_only_fields = ["rating_count"]
+        list_serializer_class = ProductListSerializer
+
+    @property
+    def fieldset(self):
+        return self.context.get("product_fieldset") or DEFAULT_FIELDSET
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.fieldset
+        if fieldset.is_default:
+            return fields
+
+        fields = {name: field for name, field in fields.items() if fieldset.includes(name)}
+        for name in EXPANDABLE:
+            if name in fields and not fieldset.expands(name):
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, many=name in MANY_RELATIONS
+                )
+        return fields
+
+    def to_representation(self, instance):
+        return self.represent([instance])[0]
+
+    # Serialized products are cached per product and updated_at, so a product
+    # is only serialized again after it (or something it embeds) changes.
+    # Relations are prefetched for the cache misses only.
+    def represent(self, products):
+        request = self.context.get("request")
+        fieldset = self.fieldset
+        fragments = self.context.setdefault("product_fragments", {})
+        keys = [product_fragment_key(product, request, fieldset.signature) for product in products]
+
+        unknown = [key for key in keys if key not in fragments]
+        if unknown:
+            fragments.update(cache.get_many(unknown))
+
+        misses = {key: product for key, product in zip(keys, products) if key not in fragments}
+        if misses:
+            prefetch_related_objects(list(misses.values()), *fieldset.prefetches())
+            fresh = {
+                key: super(ProductSerializer, self).to_representation(product)
+                for key, product in misses.items()
+            }
+            cache.set_many(fresh, settings.PRODUCT_FRAGMENT_CACHE_TIMEOUT)
+            fragments.update(fresh)
+
+        return [fragments[key] for key in keys]
 
     def get_final_price(self, obj):
         return obj.final_price()
 
     def get_average_rating(self, obj):
-        reviews = obj.reviews.all()
-        if reviews.exists():
-            return round(sum(r.rating for r in reviews) / reviews.count(), 1)
-        return 0
+        return round(obj.rating_average, 1)
+
+    def get_rating_histogram(self, obj):
+        return obj.rating_histogram()
+
+class WishlistListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        ProductSerializer(many=True, context=self.context).to_representation(
+            [item.product for item in items]
+        )
+        return super().to_representation(items)
+
 
 class WishlistSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
@@ -100,5 +180,33 @@ class WishlistSerializer(serializers.ModelSerializer):
     class Meta:
         model = Wishlist
         fields = ("id", "product", "created_at")
+        list_serializer_class = WishlistListSerializer
+
+
+class WishlistProductIdsSerializer(serializers.Serializer):
+    product_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.WISHLIST_BATCH_LIMIT,
+    )
+
+
+class WishlistBulkSerializer(serializers.Serializer):
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.WISHLIST_BATCH_LIMIT,
+        required=False,
+        default=list,
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.WISHLIST_BATCH_LIMIT,
+        required=False,
+        default=list,
+    )
+
+    def validate(self, attrs):
+        if not attrs["add"] and not attrs["remove"]:
+            raise serializers.ValidationError("Nothing to add or remove.")
+        return attrs
 
 
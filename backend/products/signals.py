@@ -0,0 +1,128 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from backend.images import schedule_variants, variants_updated
+from users.models import User
+from .models import Product, Brand, Category, Tag, Review, ProductImage, ProductNeighbours
+from .cache import bump_catalog_version
+from . import search, similarity
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    search.index_products([instance.pk])
+    similarity.schedule_update(instance.pk)
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def reindex_product_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        if pk_set:
+            Product.objects.filter(pk__in=pk_set).touch()
+        return
+    Product.objects.filter(pk=instance.pk).touch()
+    similarity.schedule_update(instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+# The neighbour row goes with the product, so hand its vector over to find the
+# lists that still point at it.
+@receiver(pre_delete, sender=Product)
+def drop_related_product(sender, instance, **kwargs):
+    vector = (
+        ProductNeighbours.objects
+        .filter(product_id=instance.pk)
+        .values_list("vector", flat=True)
+        .first()
+    )
+    similarity.schedule_update(instance.pk, bytes(vector) if vector else None)
+
+
+@receiver(post_save, sender=Brand)
+def reindex_brand(sender, instance, **kwargs):
+    search.update_brand(instance.pk, instance.name)
+
+
+@receiver(pre_delete, sender=Brand)
+def clear_brand(sender, instance, **kwargs):
+    search.update_brand(instance.pk, "")
+
+
+@receiver(post_delete, sender=Review)
+def refresh_product_rating(sender, instance, **kwargs):
+    Product.objects.filter(pk=instance.product_id).refresh_ratings()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(m2m_changed, sender=Product.tags.through)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_catalog_caches(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=ProductImage)
+def generate_product_image_variants(sender, instance, **kwargs):
+    schedule_variants(instance, "image", "variants")
+
+
+@receiver(post_save, sender=Category)
+def generate_category_image_variants(sender, instance, **kwargs):
+    schedule_variants(instance, "image", "image_variants")
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_product_for_image(sender, instance, **kwargs):
+    Product.objects.filter(pk=instance.product_id).touch()
+
+
+@receiver(variants_updated, sender=ProductImage)
+def touch_product_for_variants(sender, pk, **kwargs):
+    Product.objects.filter(images=pk).touch()
+
+
+@receiver(variants_updated, sender=Category)
+def touch_category_for_variants(sender, pk, **kwargs):
+    Category.objects.filter(pk=pk).update(updated_at=timezone.now())
+    Product.objects.filter(category=pk).touch()
+
+
+# Products embed their category, brand and tags, so changes to those move the
+# product's updated_at and with it the cached serialized fragment.
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_products_for_category(sender, instance, **kwargs):
+    Product.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Brand)
+@receiver(pre_delete, sender=Brand)
+def touch_products_for_brand(sender, instance, **kwargs):
+    Product.objects.filter(brand=instance).touch()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_products_for_tag(sender, instance, **kwargs):
+    Product.objects.filter(tags=instance).touch()
+
+
+# Products show their seller too. Saves limited to other columns, such as the
+# last_login update on every sign-in, leave the products alone.
+@receiver(post_save, sender=User)
+def touch_products_for_seller(sender, instance, update_fields=None, **kwargs):
+    if not instance.is_seller or (update_fields is not None and "email" not in update_fields):
+        return
+    Product.objects.filter(seller=instance).touch()
@@ -0,0 +1,246 @@
+import math
+import re
+import logging
+import threading
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from django.conf import settings
+from django.db import connections, transaction
+from .models import Product, ProductNeighbours
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w{2,}", re.UNICODE)
+
+FEATURE_WEIGHTS = {
+    "category": 3.0,
+    "brand": 2.0,
+    "tag": 1.5,
+    "price": 1.0,
+    "title": 1.0,
+}
+
+BLOCK_SIZE = 1024
+CUTOFF_TOLERANCE = 1e-4
+
+
+def _dimensions():
+    return getattr(settings, "RELATED_PRODUCTS_DIMENSIONS", 256)
+
+
+def _top_k():
+    return getattr(settings, "RELATED_PRODUCTS_TOP_K", 12)
+
+
+def _features(title, price, category_id, brand_id, tag_ids):
+    if category_id is not None:
+        yield f"category:{category_id}", FEATURE_WEIGHTS["category"]
+    if brand_id is not None:
+        yield f"brand:{brand_id}", FEATURE_WEIGHTS["brand"]
+    for tag_id in tag_ids:
+        yield f"tag:{tag_id}", FEATURE_WEIGHTS["tag"]
+
+    # Price bands double in width, so 90 and 110 land together but 100 and
+    # 1000 do not.
+    band = int(math.log2(max(float(price), 1)))
+    yield f"price:{band}", FEATURE_WEIGHTS["price"]
+
+    tokens = set(TOKEN_RE.findall(title.lower()))
+    for token in tokens:
+        yield f"title:{token}", FEATURE_WEIGHTS["title"] / math.sqrt(len(tokens))
+
+
+def _vectorize(rows, tags):
+    dimensions = _dimensions()
+    vectors = np.zeros((len(rows), dimensions), dtype=np.float32)
+    for i, (product_id, title, price, category_id, brand_id) in enumerate(rows):
+        for feature, weight in _features(title, price, category_id, brand_id, tags[product_id]):
+            vectors[i, zlib.crc32(feature.encode()) % dimensions] += weight
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def _catalog_rows(product_ids=None):
+    products = Product.objects.filter(is_approved=True)
+    product_tags = Product.tags.through.objects.filter(product__is_approved=True)
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+        product_tags = product_tags.filter(product_id__in=product_ids)
+
+    rows = list(products.order_by("id").values_list("id", "title", "price", "category_id", "brand_id"))
+    tags = defaultdict(list)
+    for product_id, tag_id in product_tags.values_list("product_id", "tag_id"):
+        tags[product_id].append(tag_id)
+    return rows, tags
+
+
+def _load_catalog():
+    rows, tags = _catalog_rows()
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    return ids, _vectorize(rows, tags)
+
+
+def _product_vector(product_id):
+    rows, tags = _catalog_rows([product_id])
+    return _vectorize(rows, tags)[0] if rows else None
+
+
+def _load_vectors():
+    rows = list(
+        ProductNeighbours.objects
+        .order_by("product_id")
+        .values_list("product_id", "vector", "cutoff")
+    )
+    size = _dimensions() * np.dtype(np.float32).itemsize
+    if any(len(vector) != size for _, vector, _ in rows):
+        return None
+
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    vectors = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32)
+    cutoffs = np.array([row[2] for row in rows], dtype=np.float32)
+    return ids, vectors.reshape(len(rows), _dimensions()), cutoffs
+
+
+def _top_neighbours(ids, scores, k):
+    k = min(k, len(scores))
+    if k == 0:
+        return []
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return [
+        [int(ids[i]), round(float(scores[i]), 4)]
+        for i in best
+        if scores[i] > 0
+    ]
+
+
+def _neighbour_rows(ids, vectors, positions):
+    top_k = _top_k()
+    for start in range(0, len(positions), BLOCK_SIZE):
+        chunk = positions[start:start + BLOCK_SIZE]
+        block = vectors[chunk] @ vectors.T
+        for position, scores in zip(chunk, block):
+            scores[position] = -1
+            neighbours = _top_neighbours(ids, scores, top_k)
+            # A product can only enter a full list by beating its last entry;
+            # update_related_products() uses this to find the lists to redo.
+            cutoff = neighbours[-1][1] if len(neighbours) == top_k else 0
+            yield ProductNeighbours(
+                product_id=int(ids[position]),
+                neighbours=neighbours,
+                vector=vectors[position].tobytes(),
+                cutoff=cutoff,
+            )
+
+
+@transaction.atomic
+def rebuild_related_products():
+    ids, vectors = _load_catalog()
+    rows = list(_neighbour_rows(ids, vectors, np.arange(len(ids))))
+
+    ProductNeighbours.objects.all().delete()
+    ProductNeighbours.objects.bulk_create(rows, batch_size=BLOCK_SIZE)
+    return len(rows)
+
+
+@transaction.atomic
+def update_related_products(product_id, previous=None):
+    stored = _load_vectors()
+    if stored is None:
+        # Rows written before vectors were stored, or a changed dimension
+        # setting: nothing to patch against.
+        rebuild_related_products()
+        return
+    ids, vectors, cutoffs = stored
+
+    position = np.searchsorted(ids, product_id)
+    if position < len(ids) and ids[position] == product_id:
+        previous = vectors[position]
+        ids = np.delete(ids, position)
+        vectors = np.delete(vectors, position, axis=0)
+        cutoffs = np.delete(cutoffs, position)
+    elif previous is not None:
+        previous = np.frombuffer(previous, dtype=np.float32)
+
+    # Lists that held the product under its old vector, or that it now
+    # makes the cut for, are the only ones that can change.
+    affected = np.zeros(len(ids), dtype=bool)
+    current = _product_vector(product_id)
+    for vector in (previous, current):
+        if vector is not None and len(ids):
+            scores = vectors @ vector
+            affected |= (scores > 0) & (scores >= cutoffs - CUTOFF_TOLERANCE)
+
+    if current is None:
+        ProductNeighbours.objects.filter(product_id=product_id).delete()
+    else:
+        position = np.searchsorted(ids, product_id)
+        ids = np.insert(ids, position, product_id)
+        vectors = np.insert(vectors, position, current, axis=0)
+        affected = np.insert(affected, position, True)
+
+    rows = list(_neighbour_rows(ids, vectors, np.flatnonzero(affected)))
+    for row in rows:
+        if row.product_id == product_id:
+            ProductNeighbours.objects.update_or_create(
+                product_id=product_id,
+                defaults={"neighbours": row.neighbours, "vector": row.vector, "cutoff": row.cutoff},
+            )
+    ProductNeighbours.objects.bulk_update(
+        [row for row in rows if row.product_id != product_id],
+        ["neighbours", "vector", "cutoff"],
+        batch_size=BLOCK_SIZE,
+    )
+
+
+_executor = None
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # One worker: updates read and write the whole neighbour table, so
+        # running them side by side only adds lock contention.
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="related-products")
+    return _executor
+
+
+def _run(key):
+    with _pending_lock:
+        func, args = _pending.pop(key)
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Could not refresh related products for %s", key)
+    finally:
+        connections.close_all()
+
+
+def _schedule(key, func, *args):
+    if not getattr(settings, "RELATED_PRODUCTS_LIVE_UPDATES", True):
+        return
+
+    # Saves of a product that is already queued fold into the queued job,
+    # so a bulk edit queues each product once.
+    def submit():
+        with _pending_lock:
+            queued = key in _pending
+            _pending[key] = (func, args)
+        if not queued:
+            _get_executor().submit(_run, key)
+
+    transaction.on_commit(submit)
+
+
+def schedule_update(product_id, previous=None):
+    _schedule(product_id, update_related_products, product_id, previous)
+
+
+def schedule_rebuild():
+    _schedule("rebuild", rebuild_related_products)
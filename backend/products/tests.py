@@ -1,3 +1,254 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import skipUnless
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from backend.images import refresh_variants
+from backend.testing import QueryPlanAssertionsMixin
+from users.models import User
+from .importer import ProductImportRowSerializer
+from .models import Category, Product, ProductImage, Wishlist
+from .views import (
+    ProductListCreateView,
+    ProductReviewsView,
+    SellerProductsView,
+    featured_products,
+    latest_products,
+)
 
-# Create your tests here.
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class HotQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="plans@test.com", username="plans", is_seller=True)
+
+    def view_queryset(self, view_class, **kwargs):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        view = view_class()
+        view.setup(request, **kwargs)
+        return view.get_queryset()
+
+    def test_approved_product_listing(self):
+        queryset = ProductListCreateView.queryset.all()[:9]
+        self.assertNoFullScan(queryset)
+        self.assertNoTempSort(queryset)
+        self.assertUsesIndex(queryset, "product_approved_created_idx")
+
+    def test_latest_products(self):
+        queryset = latest_products()
+        self.assertNoFullScan(queryset)
+        self.assertNoTempSort(queryset)
+
+    def test_featured_products(self):
+        queryset = featured_products()
+        self.assertNoFullScan(queryset)
+        self.assertNoTempSort(queryset)
+        self.assertUsesIndex(queryset, "product_featured_idx")
+
+    def test_seller_products(self):
+        queryset = self.view_queryset(SellerProductsView)
+        self.assertNoFullScan(queryset)
+        self.assertNoTempSort(queryset)
+
+    def test_product_reviews(self):
+        reviews = self.view_queryset(ProductReviewsView, product_id=1)
+        for ordering in (["-created_at", "-pk"], ["rating", "pk"]):
+            queryset = reviews.order_by(*ordering)[:10]
+            self.assertNoFullScan(queryset)
+            self.assertNoTempSort(queryset)
+
+    def test_wishlist(self):
+        queryset = Wishlist.objects.filter(user=self.user).order_by("-created_at")
+        self.assertNoFullScan(queryset)
+        self.assertNoTempSort(queryset)
+
+    def test_available_stock(self):
+        queryset = Product.objects.filter(pk__in=[1, 2, 3]).with_available_stock(exclude_user=self.user)
+        self.assertNoFullScan(queryset)
+        self.assertUsesIndex(queryset, "stockhold_product_expires_idx")
+
+
+class ProductFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create(email="fields@test.com", username="fields", is_seller=True)
+        # More than one page (PAGE_SIZE is 9) so cursors are followed.
+        for i in range(12):
+            Product.objects.create(
+                seller=seller,
+                title=f"Phone {i}" if i % 4 else f"Laptop stand {i}",
+                description="",
+                price=f"{10 + i}.00",
+                stock=5,
+                rating_average=i,
+                is_approved=True,
+            )
+
+    def get(self, path):
+        return APIClient().get(path)
+
+    @skipUnless(connection.vendor == "sqlite", "Search uses the SQLite FTS5 index")
+    def test_fields_with_search(self):
+        response = self.get("/api/products/?search=phone&fields=id,title")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 9)
+        for product in response.data["results"]:
+            self.assertEqual(set(product), {"id", "title"})
+
+    def test_fields_with_cursor_pagination(self):
+        for ordering in ("price", "-rating_average", "-created_at"):
+            path = f"/api/products/?pagination=cursor&ordering={ordering}&fields=id,title"
+            titles = []
+            while path:
+                # The cursor reads the ordering column; pruning it away would
+                # add a deferred-field query per page.
+                with self.assertNumQueries(1):
+                    response = self.get(path)
+                self.assertEqual(response.status_code, 200)
+                titles += [product["title"] for product in response.data["results"]]
+                for product in response.data["results"]:
+                    self.assertEqual(set(product), {"id", "title"})
+                path = response.data["next"]
+            self.assertEqual(len(titles), 12)
+            self.assertEqual(len(set(titles)), 12)
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_WIDTHS=(160, 480))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        seller = User.objects.create(email="images@test.com", username="images", is_seller=True)
+        self.product = Product.objects.create(
+            seller=seller, title="Lamp", description="", price="10.00", stock=1, is_approved=True
+        )
+
+    def upload(self, width, height):
+        buffer = BytesIO()
+        Image.new("RGB", (width, height), (200, 40, 40)).save(buffer, "PNG")
+        return SimpleUploadedFile("lamp.png", buffer.getvalue(), content_type="image/png")
+
+    def test_saved_image_gets_variants(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            image = ProductImage.objects.create(product=self.product, image=self.upload(1200, 800))
+        self.assertTrue(callbacks, "saving an image should queue its variants")
+
+        # What the queued job runs on the worker thread.
+        refresh_variants(ProductImage, image.pk, "image", "variants")
+
+        image.refresh_from_db()
+        self.assertEqual(image.variants["source"], image.image.name)
+        self.assertEqual(sorted(image.variants["sizes"]), ["160", "480"])
+        for size in image.variants["sizes"].values():
+            self.assertTrue(default_storage.exists(size["webp"]))
+            self.assertTrue(default_storage.exists(size["jpeg"]))
+        self.assertEqual(image.variants["sizes"]["480"]["width"], 480)
+
+        response = APIClient().get(f"/api/products/{self.product.pk}/")
+        served = response.data["images"][0]
+        self.assertEqual(served["variants"]["160"]["width"], 160)
+        self.assertTrue(served["variants"]["480"]["webp"].startswith("http://testserver/media/"))
+        self.assertEqual(
+            served["srcset"],
+            f'{served["variants"]["160"]["webp"]} 160w, {served["variants"]["480"]["webp"]} 480w',
+        )
+
+    def test_image_without_variants_has_no_srcset(self):
+        with self.captureOnCommitCallbacks():
+            ProductImage.objects.create(product=self.product, image=self.upload(300, 200))
+
+        served = APIClient().get(f"/api/products/{self.product.pk}/").data["images"][0]
+        self.assertEqual(served["srcset"], "")
+        self.assertEqual(served["variants"], {})
+        self.assertTrue(served["image"].endswith(".png"))
+
+
+class ProductImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(email="staff@test.com", username="staff", is_staff=True)
+        cls.seller = User.objects.create(email="importer@test.com", username="importer", is_seller=True)
+        Category.objects.create(name="Phones")
+
+    def import_rows(self, rows):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        return client.post(
+            "/api/seller/products/import/",
+            {"seller": self.seller.email, "create_missing": "1", "products": rows},
+            format="json",
+        )
+
+    def row(self, **fields):
+        return {"title": "Item", "price": "5.00", "stock": 1, **fields}
+
+    def test_new_categories_sharing_a_slug_are_row_errors(self):
+        response = self.import_rows([
+            self.row(category="Home & Garden"),
+            self.row(category="Home Garden"),
+            self.row(category="Toys"),
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [1, 2])
+        self.assertIn("home-garden", response.data["errors"][0]["errors"]["category"][0])
+        self.assertFalse(Category.objects.exclude(name="Phones").exists())
+        self.assertFalse(Product.objects.exists())
+
+    def test_new_category_taking_an_existing_slug_is_a_row_error(self):
+        response = self.import_rows([self.row(category="PHONES!")])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["row"], 1)
+        self.assertIn("phones", response.data["errors"][0]["errors"]["category"][0])
+
+    def test_new_categories_are_created(self):
+        response = self.import_rows([self.row(category="Toys"), self.row(category="Phones")])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Category.objects.get(name="Toys").slug, "toys")
+        self.assertEqual(Product.objects.filter(category__name="Phones").count(), 1)
+
+
+class ProductImportImageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for name in ("products/lamp.png", "profiles/avatar.png", "categories/phones.png"):
+            default_storage.save(name, SimpleUploadedFile(name, b"image"))
+
+    def image_errors(self, images):
+        serializer = ProductImportRowSerializer(
+            data={"title": "Lamp", "price": "5.00", "stock": 1, "images": images}
+        )
+        serializer.is_valid()
+        return serializer.errors.get("images")
+
+    def test_accepts_product_images(self):
+        self.assertIsNone(self.image_errors("products/lamp.png"))
+        self.assertIsNone(self.image_errors("/products/lamp.png"))
+
+    def test_rejects_files_outside_product_images(self):
+        for path in (
+            "profiles/avatar.png",
+            "categories/phones.png",
+            "products/../profiles/avatar.png",
+            "../products/lamp.png",
+            "products/missing.png",
+        ):
+            with self.subTest(path=path):
+                self.assertIsNotNone(self.image_errors(path))
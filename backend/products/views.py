@@ -1,6 +1,6 @@
 from django.shortcuts import render
 from rest_framework import generics, permissions, status
-from .models import Product, Category, Brand, Tag, ProductImage, Review, Wishlist
+from .models import Product, Category, Brand, Tag, ProductImage, Review, Wishlist, ProductNeighbours
 from .serializers import (
     ProductSerializer,
     CategorySerializer,
@@ -8,27 +8,58 @@ from .serializers import (
     TagSerializer,
     ReviewSerializer,
     WishlistSerializer,
+    WishlistBulkSerializer,
+    WishlistProductIdsSerializer,
 )
 from .permissions import IsSellerOrReadOnly
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from .filters import ProductFilter
+from rest_framework.filters import OrderingFilter
+from .filters import ProductFilter, ProductSearchFilter
+from .cache import get_home_payload, invalidate_home_payload, facets_cache_key
+from .importer import import_products, read_rows
+from .fieldsets import ProductFieldset
+from . import similarity
+from users.models import User
+from backend.exports import EXPORT_FORMATS, stream_export
+from backend.conditional import conditional_get, latest, queryset_stamp
+from backend.pagination import KeysetPagination
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from rest_framework.exceptions import PermissionDenied
-from django.db.models import Sum
-from orders.models import OrderItem
-
-class ProductListCreateView(generics.ListCreateAPIView):
-    queryset = Product.objects.filter(is_approved=True).order_by("-created_at")
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, Max, Prefetch, Q, When
+
+class ProductFieldsetMixin:
+    # ?fields= and ?expand= prune the serialized product and the columns and
+    # relations loaded for it. Only reads are pruned.
+    def get_fieldset(self):
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = ProductFieldset()
+            if self.request.method == "GET":
+                self._fieldset = ProductFieldset.from_request(self.request)
+        return self._fieldset
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "product_fieldset": self.get_fieldset()}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return self.get_fieldset().apply(queryset, ProductSerializer.Meta.fields)
+
+
+class ProductListCreateView(ProductFieldsetMixin, generics.ListCreateAPIView):
+    queryset = Product.objects.for_listing().filter(is_approved=True).order_by("-created_at")
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 8
 
     filter_backends = [
         DjangoFilterBackend,
-        SearchFilter,
+        ProductSearchFilter,
         OrderingFilter,
     ]
     filterset_class = ProductFilter
@@ -42,6 +73,7 @@ class ProductListCreateView(generics.ListCreateAPIView):
     ordering_fields = [
         "price",
         "created_at",
+        "rating_average",
     ]
 
     def perform_create(self, serializer):
@@ -53,36 +85,150 @@ class ProductListCreateView(generics.ListCreateAPIView):
         serializer.save(seller=self.request.user)
 
 
-class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Product.objects.filter(is_approved=True)
+def product_stamp(view, request, pk):
+    row = (
+        Product.objects
+        .filter(pk=pk, is_approved=True)
+        .annotate(tags_updated_at=Max("tags__updated_at"), tag_count=Count("tags"))
+        .values_list("updated_at", "category__updated_at", "brand__updated_at", "tags_updated_at", "tag_count")
+        .first()
+    )
+    if row is None:
+        return None
+    return ":".join(str(value) for value in row), latest(*row[:4])
+
+
+class ProductDetailView(ProductFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Product.objects.for_listing().filter(is_approved=True)
     serializer_class = ProductSerializer
+    query_budget = 6
+
+    @conditional_get(product_stamp)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+class ProductFacetsView(APIView):
+    query_budget = 6
+    search_fields = ProductListCreateView.search_fields
+    facet_params = {
+        "categories": ["category"],
+        "brands": ["brand"],
+        "tags": ["tag"],
+        "price_ranges": ["min_price", "max_price"],
+    }
+    price_ranges = [
+        (0, 100),
+        (100, 500),
+        (500, 1000),
+        (1000, 5000),
+        (5000, 10000),
+        (10000, 20000),
+        (20000, None),
+    ]
+
+    def get(self, request):
+        params = {
+            key: request.query_params[key].strip()
+            for key in [*ProductFilter.Meta.fields, "search"]
+            if request.query_params.get(key, "").strip()
+        }
+        key = facets_cache_key(params)
+        facets = cache.get(key)
+        if facets is None:
+            facets = self.compute_facets(request, params)
+            cache.set(key, facets, settings.FACETS_CACHE_TIMEOUT)
+        return Response(facets)
+
+    def filtered(self, request, params, facet):
+        params = {k: v for k, v in params.items() if k not in self.facet_params[facet]}
+        filterset = ProductFilter(params, queryset=Product.objects.filter(is_approved=True), request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        queryset = ProductSearchFilter().filter_queryset(request, filterset.qs, self)
+        return Product.objects.filter(id__in=queryset.order_by().values("id"))
+
+    def group_counts(self, queryset, field):
+        rows = (
+            queryset
+            .filter(**{f"{field}__isnull": False})
+            .values(field, f"{field}__name")
+            .annotate(count=Count("pk", distinct=True))
+            .order_by("-count", f"{field}__name")
+        )
+        return [
+            {"id": row[field], "name": row[f"{field}__name"], "count": row["count"]}
+            for row in rows
+        ]
 
-class RelatedProductsView(generics.ListAPIView):
+    def compute_facets(self, request, params):
+        price_counts = self.filtered(request, params, "price_ranges").aggregate(**{
+            str(index): Count("id", filter=Q(price__gte=low) & (Q(price__lt=high) if high else Q()))
+            for index, (low, high) in enumerate(self.price_ranges)
+        })
+
+        return {
+            "categories": self.group_counts(self.filtered(request, params, "categories"), "category"),
+            "brands": self.group_counts(self.filtered(request, params, "brands"), "brand"),
+            "tags": self.group_counts(self.filtered(request, params, "tags"), "tags"),
+            "price_ranges": [
+                {"min": low, "max": high, "count": price_counts[str(index)]}
+                for index, (low, high) in enumerate(self.price_ranges)
+            ],
+        }
+
+class RelatedProductsView(ProductFieldsetMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
+    query_budget = 8
 
     def get_queryset(self):
         product_id = self.kwargs["pk"]
-        product = Product.objects.get(id=product_id)
+        neighbours = (
+            ProductNeighbours.objects
+            .filter(product_id=product_id)
+            .values_list("neighbours", flat=True)
+            .first()
+        )
 
-        return Product.objects.filter(
-            category=product.category
-        ).exclude(id=product_id)[:4]
+        if neighbours is None:
+            return Product.objects.for_listing().filter(
+                is_approved=True,
+                category__product=product_id,
+            ).exclude(id=product_id).order_by("-created_at")[:4]
+
+        ids = [neighbour_id for neighbour_id, _ in neighbours]
+        rank = Case(*[When(id=pk, then=position) for position, pk in enumerate(ids)])
+        return Product.objects.for_listing().filter(
+            id__in=ids,
+            is_approved=True,
+        ).order_by(rank)[:4]
 
 
 class CategoryListView(generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    @conditional_get(queryset_stamp)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class BrandListView(generics.ListAPIView):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
 
+    @conditional_get(queryset_stamp)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class TagListView(generics.ListAPIView):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
+    @conditional_get(queryset_stamp)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 class ProductImageUploadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
@@ -109,14 +255,24 @@ class ProductImageUploadView(APIView):
             status=status.HTTP_201_CREATED
         )
 
-class AddReviewView(APIView):
-    permission_classes = [IsAuthenticated]
+class ProductReviewsView(generics.ListAPIView):
+    serializer_class = ReviewSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    ordering_fields = ["created_at", "rating"]
+
+    def get_queryset(self):
+        return Review.objects.filter(product_id=self.kwargs["product_id"]).select_related("user")
 
     def post(self, request, product_id):
-        rating = request.data.get("rating")
         comment = request.data.get("comment", "")
 
-        if not rating or int(rating) not in [1, 2, 3, 4, 5]:
+        try:
+            rating = int(request.data.get("rating"))
+        except (TypeError, ValueError):
+            rating = None
+
+        if rating not in [1, 2, 3, 4, 5]:
             return Response(
                 {"detail": "Rating must be between 1 and 5."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -130,22 +286,72 @@ class AddReviewView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        review = Review.objects.create(
-            product=product,
-            user=request.user,
-            rating=rating,
-            comment=comment,
-        )
+        with transaction.atomic():
+            review = Review.objects.create(
+                product=product,
+                user=request.user,
+                rating=rating,
+                comment=comment,
+            )
+            product.record_rating(rating)
 
         serializer = ReviewSerializer(review)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class SellerProductsView(generics.ListAPIView):
+class SellerProductsView(ProductFieldsetMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Product.objects.filter(seller=self.request.user).order_by("-created_at")
+        return (
+            Product.objects
+            .for_listing()
+            .filter(seller=self.request.user)
+            .order_by("-created_at")
+        )
+
+class SellerProductImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+
+    def post(self, request):
+        user = request.user
+        if not user.is_staff:
+            if not user.is_seller:
+                raise PermissionDenied("Only sellers can create products.")
+            if not user.is_seller_approved:
+                raise PermissionDenied("Seller not approved yet.")
+
+        seller = user
+        if user.is_staff and request.data.get("seller"):
+            seller = User.objects.filter(email=request.data["seller"], is_seller=True).first()
+            if seller is None:
+                return Response({"detail": "Seller not found"}, status=400)
+
+        upload = request.FILES.get("file")
+        try:
+            if upload is not None:
+                rows = read_rows(upload, upload.name)
+            else:
+                rows = request.data.get("products")
+        except (ValueError, UnicodeDecodeError):
+            return Response({"detail": "Could not parse the import file"}, status=400)
+
+        if not isinstance(rows, list) or not rows:
+            return Response({"detail": "No products to import"}, status=400)
+
+        approve = user.is_staff and str(request.data.get("approve")).lower() in ("1", "true")
+        created, errors = import_products(
+            rows,
+            seller,
+            create_missing=user.is_staff and str(request.data.get("create_missing")).lower() in ("1", "true"),
+            approve=approve,
+        )
+        if errors:
+            return Response({"created": 0, "errors": errors}, status=400)
+        if approve:
+            similarity.schedule_rebuild()
+        return Response({"created": created}, status=status.HTTP_201_CREATED)
 
 class DeleteProductImageView(APIView):
     permission_classes = [IsAuthenticated]
@@ -171,61 +377,82 @@ class DeleteProductImageView(APIView):
             status=status.HTTP_204_NO_CONTENT
         )
 
+def featured_products():
+    return (
+        Product.objects
+        .for_listing()
+        .filter(is_featured=True, is_approved=True)
+        .order_by("-created_at")[:8]
+    )
+
+
+def latest_products():
+    return (
+        Product.objects
+        .for_listing()
+        .filter(is_approved=True)
+        .order_by("-created_at")[:8]
+    )
+
+
+def best_seller_products():
+    return (
+        Product.objects
+        .for_listing()
+        .filter(is_approved=True, sales_stats__units_sold__gt=0)
+        .order_by("-sales_stats__units_sold")[:8]
+    )
+
+
+def featured_categories():
+    return (
+        Category.objects
+        .filter(sales_stats__units_sold__gt=0)
+        .order_by("-sales_stats__units_sold")[:6]
+    )
+
+
 class FeaturedProductsView(APIView):
     def get(self, request):
-        products = Product.objects.filter(is_featured=True, is_approved=True)[:8]
-        serializer = ProductSerializer(products, many=True, context={"request": request})
+        serializer = ProductSerializer(featured_products(), many=True, context={"request": request})
         return Response(serializer.data)
 
 class LatestProductsView(APIView):
     def get(self, request):
-        products = (
-            Product.objects
-            .filter(is_approved=True)
-            .order_by("-created_at")[:8]
-        )
-        serializer = ProductSerializer(products, many=True, context={"request": request})
+        serializer = ProductSerializer(latest_products(), many=True, context={"request": request})
         return Response(serializer.data)
 
 class BestSellerProductsView(APIView):
     def get(self, request):
-        product_ids = (
-            OrderItem.objects
-            .values("product")
-            .annotate(total=Sum("quantity"))
-            .order_by("-total")[:8]
-        )
-
-        ids = [p["product"] for p in product_ids]
-        products = Product.objects.filter(id__in=ids, is_approved=True)
-        serializer = ProductSerializer(products, many=True, context={"request": request})
+        serializer = ProductSerializer(best_seller_products(), many=True, context={"request": request})
         return Response(serializer.data)
 
 class FeaturedCategoriesView(APIView):
     def get(self, request):
-        category_sales = (
-            OrderItem.objects
-            .values("product__category")
-            .annotate(total_sold=Sum("quantity"))
-            .order_by("-total_sold")[:6]
-        )
+        serializer = CategorySerializer(featured_categories(), many=True , context={"request": request})
+        return Response(serializer.data)
 
-        category_ids = [
-            item["product__category"]
-            for item in category_sales
-            if item["product__category"] is not None
-        ]
+class HomePageView(APIView):
+    query_budget = 20
 
-        categories = Category.objects.filter(id__in=category_ids)
+    def get(self, request):
+        context = {"request": request}
 
-        serializer = CategorySerializer(categories, many=True , context={"request": request})
-        return Response(serializer.data)
+        def build():
+            return {
+                "featured": ProductSerializer(featured_products(), many=True, context=context).data,
+                "latest": ProductSerializer(latest_products(), many=True, context=context).data,
+                "best_sellers": ProductSerializer(best_seller_products(), many=True, context=context).data,
+                "featured_categories": CategorySerializer(featured_categories(), many=True, context=context).data,
+            }
+
+        return Response(get_home_payload(request, build))
 
 class AdminProductsView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        products = Product.objects.select_related("seller").order_by("-created_at")
+        products = Product.objects.for_listing().order_by("-created_at")
         serializer = ProductSerializer(
             products,
             many=True,
@@ -233,6 +460,31 @@ class AdminProductsView(APIView):
         )
         return Response(serializer.data)
 
+class AdminProductsExportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            return Response({"detail": "Unsupported export format"}, status=400)
+
+        products = Product.objects.order_by("-created_at")
+        fields = [
+            "id",
+            "title",
+            "seller__email",
+            "category__name",
+            "brand__name",
+            "price",
+            "discount",
+            "stock",
+            "is_approved",
+            "is_featured",
+            "rating_average",
+            "rating_count",
+            "created_at",
+        ]
+        return stream_export(products, fields, export_format, "products")
+
 class ApproveRejectProductView(APIView):
     permission_classes = [IsAdminUser]
 
@@ -252,6 +504,7 @@ class ApproveRejectProductView(APIView):
             return Response({"detail": "Invalid action"}, status=400)
 
         product.save()
+        invalidate_home_payload()
         return Response({"detail": "Product updated"})
 
 class AdminCategoriesView(APIView):
@@ -319,10 +572,22 @@ class AdminUpdateCategoryView(APIView):
 
 class WishlistView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 8
 
     def get(self, request):
-        items = Wishlist.objects.filter(user=request.user).select_related("product")
-        serializer = WishlistSerializer(items, many=True, context={"request": request})
+        items = Wishlist.objects.filter(user=request.user).order_by("-created_at")
+        # ?compact=1 returns product ids only, read straight off the
+        # (user, created_at) index without loading any product.
+        if request.query_params.get("compact") in ("1", "true"):
+            return Response(list(items.values("id", "product", "created_at")))
+
+        fieldset = ProductFieldset.from_request(request)
+        products = fieldset.apply(Product.objects.for_listing(), ProductSerializer.Meta.fields)
+        serializer = WishlistSerializer(
+            items.prefetch_related(Prefetch("product", queryset=products)),
+            many=True,
+            context={"request": request, "product_fieldset": fieldset},
+        )
         return Response(serializer.data)
 
     def post(self, request):
@@ -336,6 +601,52 @@ class WishlistView(APIView):
         )
         return Response({"detail": "Added to wishlist"}, status=status.HTTP_201_CREATED)
 
+class WishlistContainsView(APIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+
+    def post(self, request):
+        serializer = WishlistProductIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        product_ids = Wishlist.objects.filter(
+            user=request.user,
+            product_id__in=set(serializer.validated_data["product_ids"]),
+        ).values_list("product_id", flat=True)
+        return Response({"product_ids": sorted(product_ids)})
+
+
+class WishlistBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 6
+
+    def post(self, request):
+        serializer = WishlistBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add = set(serializer.validated_data["add"])
+        remove = set(serializer.validated_data["remove"]) - add
+
+        if add:
+            known = set(
+                Product.objects.filter(id__in=add, is_approved=True).values_list("id", flat=True)
+            )
+            if add - known:
+                raise ValidationError({"add": [f"Unknown product ids: {sorted(add - known)}"]})
+
+        with transaction.atomic():
+            if remove:
+                Wishlist.objects.filter(user=request.user, product_id__in=remove).delete()
+            Wishlist.objects.bulk_create(
+                [Wishlist(user=request.user, product_id=product_id) for product_id in add],
+                ignore_conflicts=True,
+            )
+
+        product_ids = Wishlist.objects.filter(
+            user=request.user, product_id__in=add | remove
+        ).values_list("product_id", flat=True)
+        return Response({"product_ids": sorted(product_ids)})
+
+
 class WishlistRemoveView(APIView):
     permission_classes = [IsAuthenticated]
 
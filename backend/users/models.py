@@ -6,6 +6,7 @@ class User(AbstractUser):
     email = models.EmailField(max_length=254, unique=True)
     phone = models.CharField(max_length=20)
     profile_image = models.ImageField(upload_to='profiles/', null=True, blank=True)
+    profile_image_variants = models.JSONField(default=dict, blank=True)
     address = models.CharField(max_length=255, blank=True, null=True)
     city = models.CharField(max_length=100, blank=True)
     country = models.CharField(max_length=100, blank=True)
@@ -21,6 +22,7 @@ class User(AbstractUser):
     is_active = models.BooleanField(default=False)
     reset_password_token = models.CharField(max_length=255, null=True, blank=True)
     reset_password_created_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
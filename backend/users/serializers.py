@@ -6,6 +6,7 @@ from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.hashers import check_password
+from backend.images import variant_urls
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
@@ -108,6 +109,7 @@ class CustomLoginSerializer(serializers.Serializer):
 
 class UserProfileSerializer(serializers.ModelSerializer):
     profile_image = serializers.SerializerMethodField()
+    profile_image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -121,6 +123,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             "country",
             "birthdate",
             "profile_image",
+            "profile_image_variants",
             "is_seller",
             "is_seller_approved",
             "is_staff",
@@ -135,6 +138,9 @@ class UserProfileSerializer(serializers.ModelSerializer):
             return f"{settings.MEDIA_URL}{obj.profile_image.name}"
         return None
 
+    def get_profile_image_variants(self, obj):
+        return variant_urls(obj.profile_image_variants, self.context.get("request"))
+
 class AdminUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
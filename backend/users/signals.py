@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from backend.images import schedule_variants, variants_updated
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def generate_profile_image_variants(sender, instance, **kwargs):
+    schedule_variants(instance, "profile_image", "profile_image_variants")
+
+
+@receiver(variants_updated, sender=User)
+def touch_user_for_variants(sender, pk, **kwargs):
+    User.objects.filter(pk=pk).update(updated_at=timezone.now())
@@ -10,6 +10,7 @@ ResetPasswordView,
 ResendActivationView,
 ChangePasswordView,
 AdminUsersView,
+AdminUsersExportView,
 AdminToggleUserView,
 )
 from rest_framework_simplejwt.views import TokenRefreshView
@@ -26,5 +27,6 @@ urlpatterns = [
     path("resend-activation/", ResendActivationView.as_view()),
     path("change-password/", ChangePasswordView.as_view()),
     path("admin/users/", AdminUsersView.as_view()),
+    path("admin/users/export/<str:export_format>/", AdminUsersExportView.as_view()),
     path("admin/users/<int:user_id>/toggle/", AdminToggleUserView.as_view()),
 ]
@@ -14,6 +14,8 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework.parsers import MultiPartParser, FormParser
+from backend.exports import EXPORT_FORMATS, stream_export
+from backend.conditional import conditional_get
 
 
 class RegisterView(APIView):
@@ -76,10 +78,15 @@ class CustomLoginView(APIView):
         serializer.is_valid(raise_exception=True)
         return Response(serializer.validated_data)
 
+def profile_stamp(view, request):
+    return f"{request.user.pk}:{request.user.updated_at}", request.user.updated_at
+
+
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
+    @conditional_get(profile_stamp, vary=["Authorization"])
     def get(self, request):
         serializer = UserProfileSerializer(
             request.user,
@@ -229,6 +236,29 @@ class AdminUsersView(APIView):
         serializer = AdminUserSerializer(users, many=True)
         return Response(serializer.data)
 
+class AdminUsersExportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            return Response({"detail": "Unsupported export format"}, status=400)
+
+        users = User.objects.filter(is_staff=False).order_by("-date_joined")
+        fields = [
+            "id",
+            "email",
+            "first_name",
+            "last_name",
+            "phone",
+            "city",
+            "country",
+            "is_active",
+            "is_seller",
+            "is_seller_approved",
+            "date_joined",
+        ]
+        return stream_export(users, fields, export_format, "users")
+
 class AdminToggleUserView(APIView):
     permission_classes = [IsAdminUser]
 
@@ -3,14 +3,16 @@ import { Link } from "react-router-dom";
 import { FaShoppingCart } from "react-icons/fa";
 import WishlistButton from "./WishlistButton";
 import { useTranslation } from "react-i18next";
+import { productImageProps } from "../utils/images";
 
 function ProductCard({ product, onAddToCart }) {
 	const { t } = useTranslation();
 
-	const image =
-		product.images && product.images.length > 0
-			? product.images[0].image
-			: "https://via.placeholder.com/300";
+	const image = productImageProps(
+		product,
+		"(min-width: 768px) 25vw, (min-width: 576px) 50vw, 100vw",
+		"https://via.placeholder.com/300"
+	);
 
 	const hasDiscount = product.discount > 0;
 
@@ -18,8 +20,9 @@ function ProductCard({ product, onAddToCart }) {
 		<Card className="h-100 shadow-sm">
 			<Card.Img
 				variant="top"
-				src={image}
+				{...image}
 				alt={product.title}
+				loading="lazy"
 				style={{ objectFit: "cover", height: 220 }}
 			/>
 
@@ -1,14 +1,56 @@
-import { Card, Badge } from "react-bootstrap";
+import { useEffect, useState } from "react";
+import { Card, Badge, Button, Form, Spinner } from "react-bootstrap";
 import { useTranslation } from "react-i18next";
+import api from "../api/axios";
 
-function ReviewList({ reviews = [] }) {
+function ReviewList({ productId, refreshKey = 0 }) {
 	const { t } = useTranslation();
 
+	const [reviews, setReviews] = useState([]);
+	const [next, setNext] = useState(null);
+	const [ordering, setOrdering] = useState("-created_at");
+	const [loading, setLoading] = useState(true);
+
+	useEffect(() => {
+		setLoading(true);
+		api
+			.get(`/products/${productId}/reviews/`, { params: { ordering } })
+			.then((res) => {
+				setReviews(res.data.results);
+				setNext(res.data.next);
+			})
+			.finally(() => setLoading(false));
+	}, [productId, ordering, refreshKey]);
+
+	const loadMore = () => {
+		setLoading(true);
+		api
+			.get(next)
+			.then((res) => {
+				setReviews((current) => [...current, ...res.data.results]);
+				setNext(res.data.next);
+			})
+			.finally(() => setLoading(false));
+	};
+
 	return (
 		<>
-			<h5 className="mb-3">{t("reviews.title")}</h5>
+			<div className="d-flex justify-content-between align-items-center mb-3">
+				<h5 className="mb-0">{t("reviews.title")}</h5>
 
-			{reviews.length === 0 && <p className="text-muted">{t("reviews.none")}</p>}
+				<Form.Select
+					size="sm"
+					className="w-auto"
+					value={ordering}
+					onChange={(e) => setOrdering(e.target.value)}
+				>
+					<option value="-created_at">{t("reviews.sort_newest")}</option>
+					<option value="-rating">{t("reviews.sort_highest")}</option>
+					<option value="rating">{t("reviews.sort_lowest")}</option>
+				</Form.Select>
+			</div>
+
+			{!loading && reviews.length === 0 && <p className="text-muted">{t("reviews.none")}</p>}
 
 			{reviews.map((review) => (
 				<Card key={review.id} className="mb-2 shadow-sm">
@@ -25,6 +67,18 @@ function ReviewList({ reviews = [] }) {
 					</Card.Body>
 				</Card>
 			))}
+
+			{loading && (
+				<div className="text-center py-2">
+					<Spinner animation="border" size="sm" />
+				</div>
+			)}
+
+			{!loading && next && (
+				<Button variant="outline-secondary" size="sm" onClick={loadMore}>
+					{t("reviews.load_more")}
+				</Button>
+			)}
 		</>
 	);
 }
@@ -15,8 +15,8 @@ function AuthProvider({ children }) {
 
 	const loadWishlist = async () => {
 		try {
-			const res = await api.get("/wishlist/");
-			setWishlistIds(new Set(res.data.map((i) => i.product.id)));
+			const res = await api.get("/wishlist/", { params: { compact: 1 } });
+			setWishlistIds(new Set(res.data.map((i) => i.product)));
 		} catch (error) {
 			console.error("Failed to load wishlist", error);
 			setWishlistIds(new Set());
@@ -11,6 +11,7 @@ function Cart() {
 	const { user, setCartCount } = useContext(AuthContext);
 	const navigate = useNavigate();
 	const [cart, setCart] = useState([]);
+	const [summary, setSummary] = useState(null);
 	const [loading, setLoading] = useState(true);
 
 	useEffect(() => {
@@ -25,10 +26,12 @@ function Cart() {
 	const loadCart = async () => {
 		try {
 			if (user) {
-				const res = await api.get("/cart/");
-				setCart(res.data);
+				const res = await api.get("/cart/summary/");
+				setCart(res.data.items);
+				setSummary(res.data);
 			} else {
 				setCart(getCart());
+				setSummary(null);
 			}
 		} catch {
 			console.error("Failed to load cart");
@@ -73,7 +76,10 @@ function Cart() {
 		else navigate("/checkout");
 	};
 
-	const total = cart.reduce((sum, item) => sum + item.price * item.quantity, 0);
+	const total = summary
+		? summary.total
+		: cart.reduce((sum, item) => sum + item.price * item.quantity, 0);
+	const subtotal = summary ? summary.subtotal : total;
 
 	if (loading) return null;
 
@@ -123,7 +129,14 @@ function Cart() {
 													className="rounded border me-3"
 													style={{ objectFit: "cover" }}
 												/>
-												<span>{item.product_title || item.title}</span>
+												<div>
+													<div>{item.product_title || item.title}</div>
+													{item.available === false && (
+														<small className="text-danger">
+															{t("cart.unavailable")}
+														</small>
+													)}
+												</div>
 											</div>
 										</td>
 
@@ -158,7 +171,9 @@ function Cart() {
 											</div>
 										</td>
 
-										<td className="text-center">${item.price * item.quantity}</td>
+										<td className="text-center">
+											${item.line_total ?? item.price * item.quantity}
+										</td>
 
 										<td className="text-center">
 											<Button
@@ -183,9 +198,16 @@ function Cart() {
 
 							<div className="d-flex justify-content-between mb-2">
 								<span>{t("cart.subtotal")}</span>
-								<strong>${total}</strong>
+								<strong>${subtotal}</strong>
 							</div>
 
+							{summary?.discount_total > 0 && (
+								<div className="d-flex justify-content-between mb-2 text-success">
+									<span>{t("cart.discount")}</span>
+									<span>-${summary.discount_total}</span>
+								</div>
+							)}
+
 							<div className="d-flex justify-content-between text-muted small mb-3">
 								<span>{t("cart.shipping")}</span>
 								<span>{t("cart.shipping_calc")}</span>
@@ -12,6 +12,7 @@ function Checkout() {
 	const { user } = useContext(AuthContext);
 
 	const [cart, setCart] = useState([]);
+	const [summary, setSummary] = useState(null);
 	const [error, setError] = useState("");
 
 	const [form, setForm] = useState({
@@ -29,9 +30,18 @@ function Checkout() {
 	useEffect(() => {
 		const loadCartForCheckout = async () => {
 			if (user) {
-				const res = await api.get("/cart/");
-				if (!res.data.length) navigate("/cart");
-				else setCart(res.data);
+				const res = await api.get("/cart/summary/");
+				if (!res.data.items.length) navigate("/cart");
+				else {
+					setCart(res.data.items);
+					setSummary(res.data);
+
+					try {
+						await api.post("/orders/checkout/start/");
+					} catch (err) {
+						showCheckoutError(err);
+					}
+				}
 			} else {
 				const items = getCart();
 				if (!items.length) navigate("/cart");
@@ -42,7 +52,18 @@ function Checkout() {
 		loadCartForCheckout();
 	}, [user, navigate]);
 
-	const total = cart.reduce((sum, item) => sum + item.price * item.quantity, 0);
+	const total = summary
+		? summary.total
+		: cart.reduce((sum, item) => sum + item.price * item.quantity, 0);
+
+	const showCheckoutError = (err) => {
+		if (err.response?.status === 409) {
+			const titles = err.response.data.lines.map((line) => line.product_title);
+			setError(t("checkout.out_of_stock", { products: titles.join(", ") }));
+		} else {
+			setError(t("checkout.failed"));
+		}
+	};
 
 	const handleChange = (e) => {
 		setForm({ ...form, [e.target.name]: e.target.value });
@@ -63,8 +84,8 @@ function Checkout() {
 
 			clearCart();
 			navigate("/order-success");
-		} catch {
-			setError(t("checkout.failed"));
+		} catch (err) {
+			showCheckoutError(err);
 		}
 	};
 
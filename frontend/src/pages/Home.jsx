@@ -4,13 +4,7 @@ import { Link, useNavigate } from "react-router-dom";
 import api from "../api/axios";
 import ProductCard from "../components/ProductCard";
 import { useTranslation } from "react-i18next";
-
-const getFirstImage = (product) => {
-	if (product?.images?.length && product.images[0].image) {
-		return product.images[0].image;
-	}
-	return "https://via.placeholder.com/1200x400?text=No+Image";
-};
+import { productImageProps } from "../utils/images";
 
 function Home() {
 	const { t } = useTranslation();
@@ -27,10 +21,12 @@ function Home() {
 	const [loadingSearch, setLoadingSearch] = useState(false);
 
 	useEffect(() => {
-		api.get("/products/featured/").then((res) => setFeatured(res.data));
-		api.get("/products/latest/").then((res) => setLatest(res.data));
-		api.get("/products/best-sellers/").then((res) => setBestSellers(res.data));
-		api.get("/categories/featured/").then((res) => setCategories(res.data));
+		api.get("/home/").then((res) => {
+			setFeatured(res.data.featured);
+			setLatest(res.data.latest);
+			setBestSellers(res.data.best_sellers);
+			setCategories(res.data.featured_categories);
+		});
 		api.get("/sellers/top/").then((res) => setTopSellers(res.data));
 	}, []);
 
@@ -101,7 +97,7 @@ function Home() {
 												onClick={() => setResults([])}
 											>
 												<img
-													src={p.images?.[0]?.image || "https://via.placeholder.com/50"}
+													{...productImageProps(p, "48px", "https://via.placeholder.com/50")}
 													alt={p.title}
 													style={{
 														width: 48,
@@ -154,7 +150,11 @@ function Home() {
 									<Carousel.Item key={product.id}>
 										<img
 											className="d-block w-100 rounded"
-											src={getFirstImage(product)}
+											{...productImageProps(
+												product,
+												"100vw",
+												"https://via.placeholder.com/1200x400?text=No+Image"
+											)}
 											alt={product.title}
 											style={{ height: 380, objectFit: "cover" }}
 										/>
@@ -19,6 +19,7 @@ function ProductDetail() {
 	const [product, setProduct] = useState(null);
 	const [loading, setLoading] = useState(true);
 	const [added, setAdded] = useState(false);
+	const [reviewsVersion, setReviewsVersion] = useState(0);
 
 	const { user, cartCount, setCartCount } = useContext(AuthContext);
 
@@ -121,12 +122,13 @@ function ProductDetail() {
 
 			<hr className="my-4" />
 
-			<ReviewList reviews={product.reviews} />
+			<ReviewList productId={product.id} refreshKey={reviewsVersion} />
 
 			<AddReview
 				productId={product.id}
 				onReviewAdded={() => {
 					api.get(`/products/${id}/`).then((res) => setProduct(res.data));
+					setReviewsVersion((version) => version + 1);
 				}}
 			/>
 
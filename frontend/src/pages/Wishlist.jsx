@@ -3,13 +3,21 @@ import { Row, Col, Card, Button, Alert } from "react-bootstrap";
 import api from "../api/axios";
 import { Link } from "react-router-dom";
 import { useTranslation } from "react-i18next";
+import { productImageProps } from "../utils/images";
 
 function Wishlist() {
 	const { t } = useTranslation();
 	const [items, setItems] = useState([]);
 
 	const load = () => {
-		api.get("/wishlist/").then((res) => setItems(res.data));
+		api
+			.get("/wishlist/", {
+				params: {
+					fields: "id,title,price,discount,final_price,images",
+					expand: "images",
+				},
+			})
+			.then((res) => setItems(res.data));
 	};
 
 	useEffect(() => {
@@ -37,7 +45,12 @@ function Wishlist() {
 						<Card className="h-100 shadow-sm wishlist-card">
 							{i.product.images?.[0] && (
 								<Card.Img
-									src={i.product.images[0].image}
+									{...productImageProps(
+										i.product,
+										"(min-width: 768px) 25vw, 100vw"
+									)}
+									alt={i.product.title}
+									loading="lazy"
 									style={{ height: 180, objectFit: "cover" }}
 								/>
 							)}
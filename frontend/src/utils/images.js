@@ -0,0 +1,11 @@
+// Props for an <img> showing a product's first image. The resized WebP
+// variants go in srcSet so the browser picks the smallest one that fits
+// `sizes`; the original is only used until the variants have been generated.
+export const productImageProps = (product, sizes, placeholder) => {
+	const image = product?.images?.[0];
+	if (!image?.image) return { src: placeholder };
+	if (!image.srcset) return { src: image.image };
+
+	const fallback = Object.values(image.variants || {}).find((size) => size.jpeg);
+	return { src: fallback?.jpeg || image.image, srcSet: image.srcset, sizes };
+};